@@ -1,15 +1,18 @@
 import socket
-import struct
 import time
 import threading
 
-from lighting_control import LightingController
+from robot_protocol import CLOCK_COMMAND
 
 
 class LightClockHandler:
-    def __init__(self, ip="192.168.8.7", port=50001, match_duration_ms=180000, animation_buffer_ms=3000, on_match_end=None):
-        # Lights
-        self.lights = LightingController()
+    def __init__(self, ip="192.168.8.7", port=50001, match_duration_ms=180000, animation_buffer_ms=3000, on_match_end=None, on_state_change=None,
+                 universe=1, lights=None):
+        # Lights (pass `lights` to use something other than the OLA controller, e.g. a stand-in)
+        if lights is None:
+            from lighting_control import LightingController
+            lights = LightingController(universe)
+        self.lights = lights
 
         # UDP config
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -18,6 +21,7 @@ class LightClockHandler:
 
         # Parent function call
         self.on_match_end = on_match_end
+        self.on_state_change = on_state_change  # called with the new state whenever current_state changes
 
         # Constants
         self.MATCH_DURATION_MS = match_duration_ms
@@ -26,8 +30,9 @@ class LightClockHandler:
         # Match state
         self.match_start_time = None
         self.match_end_time = None
+        self.arm_at = None  # time.monotonic() the robots are due to arm, once a start is requested
         self.remaining_ms = self.MATCH_DURATION_MS
-        self.current_state = "waiting"
+        self._current_state = "waiting"  # initial state, set without calling on_state_change: the owner may not be built yet
 
         # Stop flag for monitor thread
         self._stop_event = threading.Event()
@@ -42,11 +47,22 @@ class LightClockHandler:
     
 
 
+    @property
+    def current_state(self):
+        return self._current_state
+
+    @current_state.setter
+    def current_state(self, state):
+        changed = state != self._current_state
+        self._current_state = state
+        if changed and self.on_state_change:
+            self.on_state_change(state)
+
     # --------------------------
     # Helper methods
     # --------------------------
     def _send_command(self, command, time_ms):
-        data = struct.pack("!HH", command, max(0, time_ms) // 100)  # time in deciseconds
+        data = CLOCK_COMMAND.pack(command, max(0, time_ms) // 100)  # time in deciseconds
         self.sock.sendto(data, (self.ip, self.port))
         print(f"Sent command {command} with time {time_ms} ms")
 
@@ -90,10 +106,12 @@ class LightClockHandler:
 
         # tell the clock to start in 3 sec (animation buffer)
         self._send_command(1, self.remaining_ms)
+        self.arm_at = time.monotonic() + self.ANIMATION_BUFFER_MS / 1000.0
 
         def after_animation():
             self._begin_counting()
             callback(2)  # set robots to on
+            self.log_arm_latency()
 
         # schedule after animation buffer
         threading.Timer(
@@ -129,12 +147,18 @@ class LightClockHandler:
         # change the remaining_ms. If you want no animation on resume, call _begin_counting directly.
         self.current_state = "starting"
         self._send_command(3, self.remaining_ms)
+        self.arm_at = time.monotonic() + self.ANIMATION_BUFFER_MS / 1000.0
         self.lights.battle_start(chase=False)
 
         # schedule resume after animation buffer
         threading.Timer(self.ANIMATION_BUFFER_MS / 1000.0, self._begin_counting).start()
         print(f"Resume requested — animation running for {self.ANIMATION_BUFFER_MS} ms.")
 
+    def log_arm_latency(self):
+        """Print how late the robots were armed relative to arm_at (call right after arming)."""
+        if self.arm_at is not None:
+            print(f"Robots armed {(time.monotonic() - self.arm_at) * 1000:.1f} ms after the scheduled time")
+
     def add_time(self, new_time_ms):
         # set new remaining, restart countdown now (or you could keep current state paused)
         self.remaining_ms = new_time_ms
@@ -181,5 +205,6 @@ class LightClockHandler:
         """Clean up handler."""
         self._stop_event.set()
         self.lights.off()
-        self.sock.close()
+        self.lights.close()
         self._send_command(0, 0)
+        self.sock.close()
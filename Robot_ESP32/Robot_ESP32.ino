@@ -51,6 +51,15 @@ unsigned long lastPacketReceived; //used to measure time
 bool connected = false;
 #define FAILSAFE_DISCONNECT 500 //how many milliseconds of time since no packets received to activate failsafe
 
+//packet formats (see robot_protocol.py). v0: 5 x uint16. v1: version, flags, seq, then the same 5 x uint16
+#define PROTOCOL_VERSION 1
+#define PACKET_V0_LEN 10
+#define PACKET_V1_LEN 14
+uint16_t lastSeq = 0; //sequence number of the last accepted v1 packet
+//v1 flags: bit 0 = the sender started a new sequence, bits 1-7 = id of the sender's sequence
+#define FLAG_SEQ_RESET 0x01
+uint8_t lastSequenceId = 0; //sequence id of the last accepted v1 packet
+
 // Channels
 #define CH1_PWM LEDC_CHANNEL_1
 #define CH2_PWM LEDC_CHANNEL_2
@@ -567,7 +576,31 @@ void UDP_packet() {
     len = udp.read((uint8_t*)incomingPacket, sizeof(incomingPacket));
   }
 
-  if (len == 10) {
+  uint16_t values[5];
+  uint16_t seq = 0;
+  bool versioned = (len == PACKET_V1_LEN && (uint8_t)incomingPacket[0] == PROTOCOL_VERSION);
+  bool valid = (len == PACKET_V0_LEN) || versioned;
+
+  if (versioned) {
+    memcpy(&seq, incomingPacket + 2, sizeof(seq));
+    uint8_t flags = (uint8_t)incomingPacket[1];
+    uint8_t sequenceId = flags >> 1;
+    //a new sender (re-pairing, restarted server) counts from 1 again: take its first reset-flagged packet as is
+    bool newSequence = (flags & FLAG_SEQ_RESET) && sequenceId != lastSequenceId;
+    //drop reordered/stale commands, and leftovers from a sender that's been replaced.
+    //After a disconnect any sequence number is accepted (server may have restarted)
+    if (connected && !newSequence && (sequenceId != lastSequenceId || (int16_t)(seq - lastSeq) <= 0)) {
+      valid = false;
+    } else {
+      lastSeq = seq;
+      lastSequenceId = sequenceId;
+      memcpy(values, incomingPacket + 4, sizeof(values));
+    }
+  } else if (valid) {
+    memcpy(values, incomingPacket, sizeof(values));
+  }
+
+  if (valid) {
     lastPacketReceived = millis();
 
     if (!connected) {
@@ -576,7 +609,6 @@ void UDP_packet() {
         Serial.println("Connection established; receiving packets");
     }
 
-    uint16_t* values = (uint16_t*)incomingPacket;
     int v1 = values[0];
     int v2 = values[1];
     int v3 = values[2];
@@ -586,9 +618,15 @@ void UDP_packet() {
     execute_package(v1, v2, v3, v4, v5);
     mix_and_write();
 
-    bool received = true;
     udp.beginPacket(udp.remoteIP(), udp.remotePort());
-    udp.write((uint8_t*)&received, sizeof(received));
+    if (versioned) {
+      //ack: received, version, echoed seq (little-endian)
+      uint8_t ack[4] = {1, PROTOCOL_VERSION, (uint8_t)(seq & 0xFF), (uint8_t)(seq >> 8)};
+      udp.write(ack, sizeof(ack));
+    } else {
+      bool received = true;
+      udp.write((uint8_t*)&received, sizeof(received));
+    }
     udp.endPacket();
   } else if (connected && millis() - lastPacketReceived >= FAILSAFE_DISCONNECT) {
     connected = false;
@@ -0,0 +1,259 @@
+# arena.py — one arena (pairings, killswitch, clock, lights, recording) as a self-contained object
+import json
+import os
+import string
+import time
+from typing import NamedTuple, Optional, Tuple
+
+from game_state import GameState
+from killswitch_broadcast import KillswitchBroadcaster
+from LightClockHandler import LightClockHandler
+from match_history import MatchHistory
+from match_recorder import MatchRecorder, RECORDINGS_DIR
+from robot_pairing import RobotPairing, RobotControllerThread
+
+ARENAS_PATH = "arenas.json"
+
+
+class ArenaConfig(NamedTuple):
+    name: str
+    clock_ip: str = "192.168.8.7"
+    clock_port: int = 50001
+    universe: int = 1  # OLA/DMX universe of the arena's lights
+    controllers: str = string.ascii_uppercase  # controller letters that belong to this arena
+    node: Optional[Tuple[str, int]] = None  # (host, port) of the arena_node.py serving it; None = runs inside game_master
+    cpus: Optional[Tuple[int, ...]] = None  # CPU cores to pin the arena's node process to (Linux)
+    lighting: str = "ola"  # "ola", or "standin" to log lighting commands instead of driving DMX
+
+
+def load_arena_configs(path=ARENAS_PATH):
+    """
+    Read the arena list from JSON. Without a file there's exactly one arena,
+    "main", with the original clock address and universe. The first arena
+    listed is the one game_master runs itself.
+    """
+    if not os.path.exists(path):
+        return [ArenaConfig("main")]
+
+    with open(path) as f:
+        entries = json.load(f)
+
+    configs = []
+    for entry in entries:
+        if entry.get("node") is not None:
+            entry["node"] = tuple(entry["node"])
+        if entry.get("cpus") is not None:
+            entry["cpus"] = tuple(entry["cpus"])
+        configs.append(ArenaConfig(**entry))
+    return configs
+
+
+class Arena:
+    """
+    Everything one arena needs to run a match: its own GameState (pairings,
+    killswitch, match state), killswitch broadcaster, match recorder, match
+    history, and clock and lighting endpoint.
+
+    Pairings run one thread each, or in a ControlEngine given with use_engine().
+    Arenas share nothing, so several can run in one process, or each in its own
+    process or node (see arena_node.py).
+    """
+
+    def __init__(self, config, sampler, get_robot_info, send_interval=0.01, adaptive=True,
+                 on_match_end=None, lights=None):
+        self.config = config
+        self.name = config.name
+        self.sampler = sampler
+        sampler.on_controllers_changed = self._on_controllers_changed  # controller hot-plug
+        self.get_robot_info = get_robot_info  # robot_id -> (ip, port, inverts, bot_info), e.g. db_handler.get_robot_info
+        self.send_interval = send_interval
+        self.adaptive = adaptive
+        self.on_match_end = on_match_end  # extra hook when the match timer runs out (e.g. the buzzer)
+
+        self.state = GameState()
+        self.recorder = MatchRecorder(directory=os.path.join(RECORDINGS_DIR, config.name))
+        self.killswitch_broadcaster = KillswitchBroadcaster(recorder=self.recorder)
+        self.history = MatchHistory(config.name)  # results and link quality, written to the database in the background
+        self.control_engine = None  # ControlEngine when use_engine() was called, otherwise one thread per pairing
+
+        if lights is None and config.lighting == "standin":
+            from arena_standins import StandInLighting
+            lights = StandInLighting(config.name)
+        self.clock = LightClockHandler(ip=config.clock_ip, port=config.clock_port, universe=config.universe,
+                                       lights=lights, on_match_end=self._timer_stop_game,
+                                       on_state_change=lambda state: self.state.update(match_state=state))
+        self.state.subscribe(self._rotate_recording)
+
+    def use_engine(self, engine):
+        """Drive this arena's pairings from `engine` (a ControlEngine) instead of one thread each."""
+        self.control_engine = engine
+
+    def start(self):
+        self.recorder.start("session")  # packets sent before the first match
+        if self.control_engine:
+            self.control_engine.start()
+
+    def stop(self):
+        self.history.end("ABORTED")
+        self.reset()
+        if self.control_engine:
+            self.control_engine.stop()
+        self.recorder.close()
+        self.clock.stop()
+
+    def _rotate_recording(self, old, new):
+        # start a fresh match recording when the countdown begins
+        if old.match_state == "waiting" and new.match_state == "starting":
+            self.recorder.start("match")
+
+    def publish_controller_map(self, controller_map):
+        """Make the letters → pygame index map live, keeping only this arena's controllers."""
+        controller_map = {letter: i for letter, i in controller_map.items() if letter in self.config.controllers}
+        self.sampler.set_controllers(controller_map, letters=self.config.controllers)
+        self.state.update(controller_map=controller_map)
+        return controller_map
+
+    def _on_controllers_changed(self, controller_map):
+        # a pad dropped out or came back; its pairing stays, reading neutral while it's gone
+        self.state.update(controller_map=controller_map)
+
+    # --------------------------
+    # Pairings
+    # --------------------------
+    def pair(self, player_letter, robot_id):
+        state = self.state.snapshot()
+        if player_letter not in state.controller_map:
+            print(f"Controller {player_letter} is not connected!")
+            return False
+
+        # Prevent duplicate robot pairing
+        for thread in state.pairings.values():
+            if thread.bot_id == robot_id:
+                print(f"Robot {robot_id} is already paired to another controller.")
+                return False
+
+        robot_info = self.get_robot_info(robot_id)
+        if not robot_info:
+            print(f"Robot ID '{robot_id}' not found in database.")
+            return False
+
+        ip, port, inverts, bot_info = robot_info
+        if self.control_engine:
+            pairing = RobotPairing(player_letter, self.sampler, ip, port, inverts, bot_info, robot_id,
+                                   recorder=self.recorder, adaptive=self.adaptive, get_killswitch=self.get_killswitch)
+        else:
+            pairing = RobotControllerThread(player_letter, self.sampler, ip, port, inverts, bot_info, robot_id,
+                                            self.get_killswitch, self.send_interval,
+                                            recorder=self.recorder, adaptive=self.adaptive)
+
+        # checked again atomically: the GUI and the terminal can both be pairing at once
+        if not self.state.add_pairing(player_letter, pairing):
+            pairing.stop()
+            print(f"Controller {player_letter} or robot {robot_id} is already paired.")
+            return False
+
+        if self.control_engine:
+            self.control_engine.add(pairing)
+        else:
+            pairing.start()
+        self.history.track(player_letter, pairing)
+        print(f"Paired controller {player_letter} to robot {robot_id} ({ip}:{port})")
+        return True
+
+    def break_pair(self, player_id):
+        thread = self.state.pop_pairing(player_id)
+        if thread:
+            if self.control_engine:
+                self.control_engine.remove(thread)
+            else:
+                thread.stop()
+            print(f"Unpaired {player_id}")
+            return True
+        print(f"{player_id} not paired.")
+        return False
+
+    def reset(self):
+        for player_id in list(self.state.snapshot().pairings.keys()):
+            self.break_pair(player_id)
+        print("All pairings cleared.")
+
+    # --------------------------
+    # Killswitch and match flow
+    # --------------------------
+    def set_killswitch(self, ks_value):
+        """Change the killswitch and push it to every paired robot right away (don't wait for their next tick)."""
+        state = self.state.update(killswitch=ks_value)
+        self.killswitch_broadcaster.broadcast(list(state.pairings.values()), ks_value)
+
+    def get_killswitch(self):
+        return self.state.snapshot().killswitch
+
+    def _arm(self, ks_value):
+        # called by the clock once the start animation is over
+        self.set_killswitch(2)
+        print("Game started (killswitch=2)")
+
+    def _timer_stop_game(self):
+        self.set_killswitch(0)
+        print("Game stopped (killswitch=0)")
+        self.history.end("TIMER")
+        if self.on_match_end:
+            self.on_match_end()
+
+    def start_game(self):
+        if self.clock.current_state == "waiting":
+            self.history.start(self.state.snapshot().pairings)
+        self.clock.start_match(self._arm)
+
+    def stop_game(self):
+        self.set_killswitch(0)  # robots first, clock and lights after
+        self.clock.ko_match()
+        print("Game stopped (killswitch=0)")
+        self.history.end("KO")
+
+    def declare_winner(self, winner):
+        """End the match with `winner` (a team color) celebrated by the lights."""
+        self.set_killswitch(0)
+        self.clock.winner(winner)
+        self.history.end("WINNER", winner)
+
+    def pause_game(self):
+        self.set_killswitch(0)  # robots first, clock and lights after
+        self.clock.pause_match()
+        print("game paused (killswitch=0)")
+
+    def resume_game(self):
+        self.clock.resume_match()
+        print("Game will resume after 3 2 1 countdown")
+        time.sleep(3)
+        self.set_killswitch(2)
+        self.clock.log_arm_latency()
+        print("Game resumed (killswitch=2)")
+
+    # --------------------------
+    # Monitoring
+    # --------------------------
+    def get_pairing_stats(self):
+        """Return live link stats (RTT percentiles, ack loss, send jitter) for every active pairing."""
+        stats = {}
+        for player, thread in self.state.snapshot().pairings.items():
+            entry = {"robot_id": thread.bot_id, "ip": thread.ip, "port": thread.port}
+            entry.update(thread.acks.summary())
+            entry.update(thread.policy.summary())
+            ticker = self.control_engine.ticker if self.control_engine else thread.ticker
+            entry.update(ticker.summary())
+            stats[player] = entry
+        return stats
+
+    def status(self):
+        """A JSON-friendly summary of the arena, as reported by arena nodes."""
+        state = self.state.snapshot()
+        return {
+            "name": self.name,
+            "match_state": state.match_state,
+            "killswitch": state.killswitch,
+            "remaining_ms": self.clock.get_remaining_time(),
+            "controllers": sorted(state.controller_map),
+            "pairings": {player: pairing.bot_id for player, pairing in state.pairings.items()},
+            "last_killswitch": self.killswitch_broadcaster.last_result,
+        }
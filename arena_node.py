@@ -0,0 +1,251 @@
+# arena_node.py — runs one arena in its own process (on this box or another node) and takes commands over the LAN
+#
+#   python arena_node.py --arena arena2
+#
+# The arena's settings (clock, DMX universe, controllers, node address, CPU cores) come from
+# arenas.json. game_master starts nodes whose host is local itself and talks to every node
+# through an ArenaClient.
+#
+# A node listens only on its configured address. Every request must carry ARENA_NODE_SECRET
+# from .env (required for nodes that aren't on localhost), and ARENA_NODE_ALLOWED_HOSTS can
+# further limit which machines may connect.
+import argparse
+import hmac
+import json
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOCAL_HOSTS = ("127.0.0.1", "localhost")
+CALL_TIMEOUT = 5.0  # seconds; resume_game blocks for the 3 s countdown
+
+NODE_SECRET = os.getenv("ARENA_NODE_SECRET", "")
+# comma-separated IPs allowed to connect to a node; empty = any machine that has the secret
+ALLOWED_HOSTS = tuple(h.strip() for h in os.getenv("ARENA_NODE_ALLOWED_HOSTS", "").split(",") if h.strip())
+
+# Arena methods a coordinator may call on a node
+COMMANDS = ("pair", "break_pair", "reset", "set_killswitch", "start_game", "stop_game",
+            "pause_game", "resume_game", "declare_winner", "get_pairing_stats", "status")
+
+
+def pin_to_cpus(cpus):
+    """Restrict this process to the given CPU cores (Linux only), so arenas don't compete for a core."""
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, set(cpus))
+            print(f"Pinned to CPU cores {sorted(cpus)}")
+        except OSError as e:
+            print(f"Could not pin to CPU cores {sorted(cpus)}: {e}")
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    # one JSON request per line: {"command": ..., "args": [...], "secret": ...} -> {"ok": ..., "result"/"error": ...}
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                request = {}
+            if not self.server.authorized(request):
+                print(f"Rejected a request from {self.client_address[0]}: wrong or missing secret")
+                self.wfile.write((json.dumps({"ok": False, "error": "unauthorized"}) + "\n").encode())
+                return  # drop the connection
+            try:
+                command = request["command"]
+                if command not in COMMANDS:
+                    raise ValueError(f"unknown command {command!r}")
+                result = getattr(self.server.arena, command)(*request.get("args", []))
+                reply = {"ok": True, "result": result}
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(reply) + "\n").encode())
+
+
+class ArenaServer(socketserver.ThreadingTCPServer):
+    """
+    Serves an Arena's commands to coordinators over TCP, one thread per
+    connection. With a `secret`, requests without it are refused; with
+    `allowed_hosts`, so are connections from any other address.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, arena, host="127.0.0.1", port=50100, secret=NODE_SECRET, allowed_hosts=ALLOWED_HOSTS):
+        self.arena = arena
+        self.secret = secret
+        self.allowed_hosts = allowed_hosts
+        super().__init__((host, port), _CommandHandler)
+
+    def verify_request(self, request, client_address):
+        if self.allowed_hosts and client_address[0] not in self.allowed_hosts:
+            print(f"Refused a connection from {client_address[0]} (not in ARENA_NODE_ALLOWED_HOSTS)")
+            return False
+        return True
+
+    def authorized(self, request):
+        if not self.secret:
+            return True
+        secret = request.get("secret")
+        return isinstance(secret, str) and hmac.compare_digest(secret.encode(), self.secret.encode())
+
+
+class ArenaClient:
+    """
+    Talks to an arena running in an arena_node.py process, with the same
+    methods as Arena for everything a coordinator does. On a network error the
+    problem is printed and the call returns None.
+    """
+
+    def __init__(self, host, port, name=None, timeout=CALL_TIMEOUT, secret=NODE_SECRET):
+        self.address = (host, port)
+        self.name = name or f"{host}:{port}"
+        self.timeout = timeout
+        self.secret = secret
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()  # one request in flight per connection
+
+    def call(self, command, *args):
+        with self._lock:
+            for attempt in range(2):  # reconnect once if the node was restarted
+                try:
+                    if self._sock is None:
+                        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+                        self._file = self._sock.makefile("rb")
+                    request = {"command": command, "args": list(args), "secret": self.secret}
+                    self._sock.sendall((json.dumps(request) + "\n").encode())
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError("connection closed by node")
+                    reply = json.loads(line)
+                    break
+                except (OSError, ValueError) as e:
+                    self.close()
+                    if attempt:
+                        print(f"[{self.name}] {command} failed: {e}")
+                        return None
+        if not reply["ok"]:
+            print(f"[{self.name}] {command} failed: {reply['error']}")
+            return None
+        return reply["result"]
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = None
+        self._file = None
+
+    def pair(self, player_letter, robot_id):
+        return self.call("pair", player_letter, robot_id)
+
+    def break_pair(self, player_id):
+        return self.call("break_pair", player_id)
+
+    def reset(self):
+        return self.call("reset")
+
+    def set_killswitch(self, ks_value):
+        return self.call("set_killswitch", ks_value)
+
+    def start_game(self):
+        return self.call("start_game")
+
+    def stop_game(self):
+        return self.call("stop_game")
+
+    def pause_game(self):
+        return self.call("pause_game")
+
+    def resume_game(self):
+        return self.call("resume_game")
+
+    def declare_winner(self, winner):
+        return self.call("declare_winner", winner)
+
+    def get_pairing_stats(self):
+        return self.call("get_pairing_stats")
+
+    def status(self):
+        return self.call("status")
+
+
+def spawn_local_node(config):
+    """Start an arena node for `config` as a separate process on this machine."""
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "--arena", config.name])
+
+
+def serve(config, controller_map_path="controller_map.json", interval=0.01):
+    """Run `config`'s arena in this process until interrupted."""
+    import pygame
+
+    import db_handler
+    from arena import Arena
+    from channel_mixer import PairingTable
+    from control_engine import ControlEngine
+    from joystick_sampler import JoystickSampler, DEFAULT_AXES, map_controllers
+    from match_history import stop_writer
+
+    pin_to_cpus(config.cpus)
+
+    pygame.init()
+    pygame.joystick.init()
+    sampler = JoystickSampler(DEFAULT_AXES)
+
+    # a node only has its own arena to run, so always drive it from one engine loop
+    arena = Arena(config, sampler, db_handler.get_robot_info, send_interval=interval)
+    arena.use_engine(ControlEngine(arena.get_killswitch, interval=interval, pre_tick=sampler.sample,
+                                   table=PairingTable(sampler)))
+
+    try:
+        with open(controller_map_path) as f:
+            letter_to_uid = json.load(f)
+    except FileNotFoundError:
+        print(f"No controller map JSON found at {controller_map_path}. No controllers mapped.")
+        letter_to_uid = {}
+    print(f"[{config.name}] controllers:", arena.publish_controller_map(map_controllers(letter_to_uid, config.controllers)))
+
+    arena.start()
+    threading.Thread(target=db_handler.get_roster, daemon=True).start()  # warm the roster so the first pair is a memory lookup
+    host, port = config.node
+    if host not in LOCAL_HOSTS and not NODE_SECRET:
+        arena.stop()
+        sys.exit(f"[{config.name}] refusing to serve on {host}: set ARENA_NODE_SECRET in .env on every machine")
+    try:
+        server = ArenaServer(arena, host, port)  # only the configured interface, never 0.0.0.0
+    except OSError as e:
+        arena.stop()
+        sys.exit(f"[{config.name}] could not listen on {host}:{port} (is that this machine's address?): {e}")
+    signal.signal(signal.SIGTERM, lambda sig, frame: threading.Thread(target=server.shutdown).start())
+    print(f"[{config.name}] serving on {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        arena.stop()
+        stop_writer()
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    from arena import load_arena_configs, ARENAS_PATH
+
+    parser = argparse.ArgumentParser(description="Run one arena as its own process")
+    parser.add_argument("--arena", required=True, help="arena name from arenas.json")
+    parser.add_argument("--config", default=ARENAS_PATH, help="arena list (JSON)")
+    parser.add_argument("--controller-map", default="controller_map.json", help="letters → controller UID map")
+    args = parser.parse_args()
+
+    configs = {config.name: config for config in load_arena_configs(args.config)}
+    if args.arena not in configs or configs[args.arena].node is None:
+        sys.exit(f"No arena named {args.arena!r} with a node address in {args.config}")
+    serve(configs[args.arena], args.controller_map)
@@ -0,0 +1,105 @@
+# arena_standins.py — local stand-ins for an arena's clock and lights, for running arenas without the hardware
+#
+#   python arena_standins.py --port 50002      listen for clock commands on localhost:50002
+#
+# Point an arena at it with "clock_ip": "127.0.0.1", "clock_port": 50002 and "lighting": "standin"
+# in arenas.json, and use robot_simulator.py for its robots.
+import argparse
+import socket
+import threading
+import time
+
+from robot_protocol import CLOCK_COMMAND
+
+CLOCK_COMMANDS = {0: "wait", 1: "start", 2: "pause", 3: "resume", 4: "set time", 5: "end"}
+
+
+class StandInLighting:
+    """Takes the place of LightingController: logs each lighting command instead of sending DMX."""
+
+    def __init__(self, name="arena"):
+        self.name = name
+        self.commands = []  # (time.monotonic(), command) in the order received
+        self.waiting = threading.Event()
+
+    def _log(self, command):
+        self.commands.append((time.monotonic(), command))
+        print(f"[{self.name} lights] {command}")
+
+    def wait(self, wait_time=5):
+        self._log(f"wait ({wait_time} s)")
+
+    def _wait_loop(self, wait=5):
+        self._log("wait loop")
+
+    def stop_wait(self):
+        self.waiting.clear()
+
+    def battle_start(self, chase=True):
+        self._log("battle start" + (" with chase" if chase else ""))
+
+    def pause(self):
+        self._log("pause")
+
+    def celebrate(self, color):
+        self._log(f"celebrate {color}")
+
+    def off(self):
+        self._log("off")
+
+    def close(self):
+        self._log("close")
+
+
+class ClockStandIn:
+    """Listens where an arena clock would and records the commands it's sent."""
+
+    def __init__(self, host="127.0.0.1", port=50001, name="clock"):
+        self.name = name
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.2)
+        self.commands = []  # (time.monotonic(), command, time_ms)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                data, _ = self.sock.recvfrom(64)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            if len(data) != CLOCK_COMMAND.size:
+                print(f"[{self.name}] malformed command: {data!r}")
+                continue
+            command, deciseconds = CLOCK_COMMAND.unpack(data)
+            self.commands.append((time.monotonic(), command, deciseconds * 100))
+            print(f"[{self.name}] {CLOCK_COMMANDS.get(command, command)} {deciseconds / 10:.1f} s")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread and threading.current_thread() != self._thread:
+            self._thread.join(timeout=1)
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in arena clock on localhost")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50001)
+    args = parser.parse_args()
+
+    clock = ClockStandIn(args.host, args.port)
+    print(f"Clock stand-in listening on {args.host}:{args.port}. Ctrl+C to stop.")
+    try:
+        clock.run()
+    except KeyboardInterrupt:
+        pass
+    clock.stop()
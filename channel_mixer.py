@@ -0,0 +1,178 @@
+# channel_mixer.py — controller input → ch1-ch3 PWM values, per robot and batched
+import math
+
+import numpy as np
+
+from joystick_sampler import FIELDS, FIELD_X, FIELD_Y, FIELD_LEFT_TRIGGER, FIELD_RIGHT_TRIGGER, FIELD_HAT_Y
+
+DEAD_ZONE = 25
+VECTOR_MIN_ROWS = 11  # below this many pairings the scalar path is faster (control_benchmark.py: ~1.5 us per pairing vs ~16 us per pass)
+
+
+def scale_axis_drive(value, flip, limit):
+    if value < -1.0 or value > 1.0:
+        print("Axis value out of range:", value)
+        value = 0.0
+    if flip:
+        #return 2000 - int((value + 1) * 500 * limit)
+        return int((-value) * 500 * limit) + 1500
+    else:
+        #return int((value + 1) * 500 * limit) + 1000
+        return int(value * 500 * limit) + 1500
+
+def scale_axis_spinner(value, ch3_invert, weapon_scale, bidirectional):
+    # Normalize trigger axis from [-1..1] to [0..1]
+    if value < -1.0 or value > 1.0:
+        print('CH3 OUT OF BOUNDS!')
+        value = 0.0
+    norm_val = (value + 1) / 2
+
+    if ch3_invert:
+        if(bidirectional):
+            return 1500 - int(norm_val * 500 * weapon_scale)
+        else:
+            return 2000 - int(norm_val * 1000 * weapon_scale)
+    else:
+        if(bidirectional):
+            return 1500 + int(norm_val * 500 * weapon_scale)
+        else:
+            return 1000 + int(norm_val * 1000 * weapon_scale)
+
+def check_dead_zone(a, b):
+    dist = math.sqrt((1500 - a) ** 2 + (1500 - b) ** 2)
+    if dist <= DEAD_ZONE:
+        return 1500, 1500
+    return a, b
+
+
+class PairingTable:
+    """
+    Array-backed table of active pairings, one row per robot, that computes
+    ch1-ch3 for every robot in a single NumPy pass per tick (or pairing by
+    pairing with the scalar functions, while there are fewer than
+    VECTOR_MIN_ROWS).
+
+    Each row holds the controller slot and, per output channel, the constants
+    the scalar functions would apply: span (500, or 1000 for a one-way weapon),
+    limit from the robot type, sign from the invert flag and base value. The
+    math mirrors scale_axis_drive, scale_axis_spinner and check_dead_zone step
+    for step (same float64 operations in the same order, truncation toward
+    zero like int()), so the results are bit-identical to the scalar functions.
+
+    All three channels of every row go through each NumPy call together, so a
+    tick costs the same couple of dozen array operations for any number of
+    pairings.
+    """
+
+    def __init__(self, sampler, capacity=8):
+        self.sampler = sampler
+        self.pairings = []  # row -> pairing; rows are kept packed at the front
+        self._rows = {}  # player_id -> row
+
+        self.slot = np.zeros(capacity, dtype=np.intp)
+        self.swap_drive = np.zeros(capacity, dtype=bool)
+        # per row, for (ch1, ch2, ch3) before the steer/forward swap
+        self._span = np.zeros((capacity, 3), dtype=np.float64)
+        self._limit = np.zeros((capacity, 3), dtype=np.float64)
+        self._sign = np.zeros((capacity, 3), dtype=np.float64)
+        self._base = np.zeros((capacity, 3), dtype=np.float64)
+        self._work = np.zeros((capacity, 3), dtype=np.float64)  # scratch for compute()
+
+    _COLUMNS = ("slot", "swap_drive", "_span", "_limit", "_sign", "_base", "_work")
+
+    def __len__(self):
+        return len(self.pairings)
+
+    def add(self, pairing):
+        if pairing.player_id in self._rows:
+            self.remove(pairing.player_id)
+
+        row = len(self.pairings)
+        if row == len(self.slot):
+            for name in self._COLUMNS:
+                column = getattr(self, name)
+                setattr(self, name, np.concatenate((column, np.zeros_like(column))))
+
+        ch1_invert, ch2_invert, ch3_invert, swap_drive = pairing.inverts
+        steering_limit, forward_limit, weapon_limit, bidirectional = pairing.bot_info
+        self.slot[row] = pairing.slot
+        self.swap_drive[row] = swap_drive
+        self._span[row] = (500.0, 500.0, 500.0 if bidirectional else 1000.0)
+        self._limit[row] = (steering_limit, forward_limit, weapon_limit)
+        self._sign[row] = [-1.0 if invert else 1.0 for invert in (ch1_invert, ch2_invert, ch3_invert)]
+        self._base[row] = (1500.0, 1500.0, 1500.0 if bidirectional else 2000.0 if ch3_invert else 1000.0)
+
+        self.pairings.append(pairing)
+        self._rows[pairing.player_id] = row
+
+    def remove(self, player_id):
+        row = self._rows.pop(player_id, None)
+        if row is None:
+            return
+
+        # move the last row into the gap so active rows stay contiguous
+        last = len(self.pairings) - 1
+        if row != last:
+            for name in self._COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            moved = self.pairings[last]
+            self.pairings[row] = moved
+            self._rows[moved.player_id] = row
+        self.pairings.pop()
+
+    def compute(self):
+        """Return (ch1, ch2, ch3) lists of ints, one entry per row, from the sampler's latest snapshot."""
+        n = len(self.pairings)
+        if n < VECTOR_MIN_ROWS:
+            # NumPy's per-call overhead outweighs the per-robot work for a handful of robots
+            rows = [pairing.read_channels() for pairing in self.pairings]
+            return [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows]
+        return self.compute_arrays(n).T.tolist()
+
+    def compute_arrays(self, n=None):
+        """The vectorised pass: an (n, 3) int64 array of ch1-ch3 for the first n rows (all by default)."""
+        if n is None:
+            n = len(self.pairings)
+        snapshot = np.frombuffer(self.sampler.snapshot(), dtype=np.float64).reshape(-1, FIELDS)
+        inputs = snapshot[self.slot[:n]]
+
+        # one row per pairing: steer, forward, weapon inputs, scaled in place
+        work = self._work[:n]
+        work[:, 0] = inputs[:, FIELD_X]
+        work[:, 1] = inputs[:, FIELD_Y]
+        np.maximum(inputs[:, FIELD_LEFT_TRIGGER], inputs[:, FIELD_RIGHT_TRIGGER], out=work[:, 2])
+
+        #account for "mode" being pressed
+        hat_y = inputs[:, FIELD_HAT_Y]
+        if np.count_nonzero(hat_y):
+            pressed = hat_y != 0
+            work[pressed, 1] = hat_y[pressed] * -1
+
+        if np.count_nonzero(np.abs(work) > 1.0):
+            self._reset_out_of_range(work)
+
+        work[:, 2] += 1
+        work[:, 2] /= 2  # trigger [-1..1] -> [0..1]
+        work *= self._span[:n]
+        work *= self._limit[:n]
+        np.trunc(work, out=work)
+
+        # dead zone: sqrt(d1² + d2²) <= DEAD_ZONE on whole numbers, so compare the squares
+        centred = work[:, 0] * work[:, 0] + work[:, 1] * work[:, 1] <= DEAD_ZONE * DEAD_ZONE
+        if np.count_nonzero(centred):
+            work[centred, :2] = 0.0
+
+        out = (work * self._sign[:n] + self._base[:n]).astype(np.int64)
+        swap = self.swap_drive[:n]
+        if np.count_nonzero(swap):
+            out[swap, :2] = out[swap, 1::-1]
+        return out
+
+    @staticmethod
+    def _reset_out_of_range(work):
+        for v in work[:, :2][np.abs(work[:, :2]) > 1.0]:
+            print("Axis value out of range:", float(v))
+        for _ in range(int((np.abs(work[:, 2]) > 1.0).sum())):
+            print('CH3 OUT OF BOUNDS!')
+        work[np.abs(work) > 1.0] = 0.0
@@ -0,0 +1,297 @@
+# control_benchmark.py — repeatable benchmarks for the robot control hot path
+#
+#   python control_benchmark.py                  run, compare against the baseline if there is one
+#   python control_benchmark.py --save-baseline  run and store the results as the new baseline
+#   python control_benchmark.py --compare        run and compare; fails if there is no baseline
+#
+# Timings only mean something on the machine they were taken on, so the
+# baseline (bench_baseline.json) is not committed. Record one on the arena PC
+# with --save-baseline on a known-good checkout, then use --compare after
+# changes; exit status 1 means a regression, 2 means no baseline to compare to.
+#
+# Micro benchmarks time the per-packet functions. Loop benchmarks run the real
+# RobotControllerThread / ControlEngine paths against robot_simulator.py (in a
+# separate process, with no added latency) acting as a local UDP echo.
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import timeit
+
+from channel_mixer import scale_axis_drive, scale_axis_spinner, check_dead_zone, PairingTable
+from control_engine import ControlEngine
+from joystick_sampler import JoystickSampler, FIELDS, FIELD_X, FIELD_Y, FIELD_RIGHT_TRIGGER
+from robot_pairing import RobotPairing, RobotControllerThread
+from robot_protocol import ControlPacket
+from robot_simulator import RobotFleet
+
+BASELINE_PATH = "bench_baseline.json"
+PAIRING_COUNTS = (1, 4, 8, 16)
+INTERVAL = 0.01  # same as game_master.SEND_INTERVAL
+BASE_PORT = 5800
+LETTERS = "ABCDEFGHIJKLMNOP"
+INVERTS = [False, True, True, False]
+BOT_INFO = [0.6, 0.9, 0.4, True]  # DRUM
+
+# a metric regresses when it gets worse than the baseline by more than this fraction
+TOLERANCE = {
+    "us_per_call": 0.25,
+    "cpu_us_per_tick": 0.25,
+    "cpu_us_per_pairing": 0.25,
+    "send_hz": 0.05,
+    "tick_jitter_ms": 0.5,
+}
+# ...and by at least this much in absolute terms (sub-millisecond jitter is mostly scheduler noise)
+MIN_CHANGE = {
+    "tick_jitter_ms": 0.5,
+    "cpu_us_per_tick": 50.0,
+    "cpu_us_per_pairing": 10.0,
+}
+HIGHER_IS_BETTER = {"send_hz"}
+
+
+class SyntheticSampler(JoystickSampler):
+    """JoystickSampler fed by a moving synthetic stick instead of pygame, so every tick changes the channels."""
+
+    def __init__(self, max_controllers=16):
+        super().__init__((0, 1, 2, 3), max_controllers)
+        for slot in range(max_controllers):
+            self._write_neutral(self._front, slot)
+            self._write_neutral(self._back, slot)
+        self._phase = 0.0
+
+    def sample(self):
+        self._phase += 0.05
+        back = self._back
+        for slot in range(len(self.joysticks)):
+            base = slot * FIELDS
+            back[base + FIELD_X] = math.sin(self._phase + slot)
+            back[base + FIELD_Y] = math.cos(self._phase + slot)
+            back[base + FIELD_RIGHT_TRIGGER] = math.sin(self._phase * 0.5)
+        self._back, self._front = self._front, back
+        self.timestamp = time.monotonic()
+        self.samples += 1
+
+
+# --------------------------
+# Micro benchmarks
+# --------------------------
+def _time_call(stmt, number):
+    best = min(timeit.repeat(stmt, number=number, repeat=5))
+    return best / number * 1e6
+
+
+def run_micro(number=100000):
+    packet = ControlPacket(version=1)
+    sampler = SyntheticSampler()
+    sampler.sample()
+    pairing = RobotPairing("A", sampler, "127.0.0.1", BASE_PORT, INVERTS, BOT_INFO, "900")
+    table = PairingTable(sampler, capacity=16)
+    pairings = [RobotPairing(LETTERS[i], sampler, "127.0.0.1", BASE_PORT + i, INVERTS, BOT_INFO, str(900 + i))
+                for i in range(16)]
+    for p in pairings:
+        table.add(p)
+    table_8 = PairingTable(sampler)
+    for p in pairings[:8]:
+        table_8.add(p)
+
+    results = {
+        "scale_axis_drive": _time_call(lambda: scale_axis_drive(0.37, True, 0.9), number),
+        "scale_axis_spinner": _time_call(lambda: scale_axis_spinner(0.37, False, 0.4, True), number),
+        "check_dead_zone": _time_call(lambda: check_dead_zone(1510, 1720), number),
+        "packet_pack": _time_call(lambda: packet.pack(1500, 1720, 1300, 2, 0), number),
+        "read_channels": _time_call(pairing.read_channels, number),
+        "pairing_table_compute_8": _time_call(table_8.compute, number // 10),  # scalar path, below VECTOR_MIN_ROWS
+        "pairing_table_compute_16": _time_call(table.compute, number // 10),
+        "pairing_table_arrays_8": _time_call(table_8.compute_arrays, number // 10),
+    }
+
+    pairing.stop()
+    for p in pairings:
+        p.stop()
+    return {name: {"us_per_call": us} for name, us in results.items()}
+
+
+# --------------------------
+# Loop benchmarks
+# --------------------------
+def _serve_fleet(count, base_port, duration):
+    fleet = RobotFleet(count, base_port=base_port, latency=0.0, jitter=0.0)
+    fleet.run(duration)
+
+
+def _start_fleet(count, duration):
+    fleet = multiprocessing.Process(target=_serve_fleet, args=(count, BASE_PORT, duration + 2), daemon=True)
+    fleet.start()
+    time.sleep(0.3)  # let it bind its ports
+    return fleet
+
+
+def _loop_result(pairings, tickers, cpu, elapsed):
+    ticks = sum(t.ticks for t in tickers) / len(tickers)  # control periods (every pairing once)
+    sent = sum(p.acks.sent for p in pairings)
+    p95 = [p.acks.stats.rtt_percentiles((95,))[0] for p in pairings]
+    p95 = [ms for ms in p95 if ms is not None]
+    return {
+        "cpu_us_per_tick": cpu / ticks * 1e6 if ticks else None,
+        "cpu_us_per_pairing": cpu / ticks / len(pairings) * 1e6 if ticks else None,
+        "send_hz": sent / elapsed / len(pairings),
+        "tick_jitter_ms": max(t.jitter for t in tickers) * 1000,
+        "max_late_ms": max(t.max_late for t in tickers) * 1000,
+        "overruns": sum(t.overruns for t in tickers),
+        "loss_rate": sum(p.acks.lost for p in pairings) / sent if sent else None,
+        "rtt_p95_ms": max(p95) if p95 else None,
+    }
+
+
+def run_threads(count, duration):
+    """One RobotControllerThread per pairing plus the sampler thread, as game_master runs by default."""
+    sampler = SyntheticSampler()
+    fleet = _start_fleet(count, duration)
+    sampler.start(INTERVAL)
+    pairings = [RobotControllerThread(LETTERS[i], sampler, "127.0.0.1", BASE_PORT + i, INVERTS, BOT_INFO,
+                                      str(900 + i), lambda: 2, INTERVAL, adaptive=False)
+                for i in range(count)]
+
+    cpu0, t0 = time.process_time(), time.monotonic()
+    for p in pairings:
+        p.start()
+    time.sleep(duration)
+    cpu, elapsed = time.process_time() - cpu0, time.monotonic() - t0
+
+    for p in pairings:
+        p.stop()
+    sampler.stop()
+    fleet.terminate()
+    fleet.join()
+    return _loop_result(pairings, [p.ticker for p in pairings], cpu, elapsed)
+
+
+def run_engine(count, duration):
+    """Every pairing driven by one ControlEngine with the NumPy PairingTable, as with game_master -engine."""
+    sampler = SyntheticSampler()
+    fleet = _start_fleet(count, duration)
+    engine = ControlEngine(lambda: 2, interval=INTERVAL, pre_tick=sampler.sample, table=PairingTable(sampler))
+    pairings = [RobotPairing(LETTERS[i], sampler, "127.0.0.1", BASE_PORT + i, INVERTS, BOT_INFO,
+                             str(900 + i), adaptive=False)
+                for i in range(count)]
+    for p in pairings:
+        engine.add(p)
+
+    cpu0, t0 = time.process_time(), time.monotonic()
+    engine.start()
+    time.sleep(duration)
+    cpu, elapsed = time.process_time() - cpu0, time.monotonic() - t0
+
+    engine.stop()
+    fleet.terminate()
+    fleet.join()
+    return _loop_result(pairings, [engine.ticker], cpu, elapsed)
+
+
+def run_all(duration):
+    results = {"micro": run_micro()}
+    for mode, runner in (("threads", run_threads), ("engine", run_engine)):
+        for count in PAIRING_COUNTS:
+            name = f"{mode}_{count}"
+            print(f"  {name} ...", flush=True)
+            results[name] = runner(count, duration)
+    return results
+
+
+# --------------------------
+# Reporting
+# --------------------------
+def _fmt(value):
+    return "-" if value is None else f"{value:.2f}"
+
+
+def print_results(results):
+    print(f"\n{'micro':<28} {'us/call':>10}")
+    for name, row in results["micro"].items():
+        print(f"{name:<28} {_fmt(row['us_per_call']):>10}")
+
+    columns = ("cpu_us_per_tick", "cpu_us_per_pairing", "send_hz", "tick_jitter_ms", "max_late_ms", "rtt_p95_ms", "loss_rate")
+    print(f"\n{'loop':<12}" + "".join(f"{c:>20}" for c in columns))
+    for name, row in results.items():
+        if name != "micro":
+            print(f"{name:<12}" + "".join(f"{_fmt(row[c]):>20}" for c in columns))
+
+
+def compare(results, baseline):
+    """Return a list of regression messages (empty if everything is within tolerance)."""
+    regressions = []
+
+    def check(name, metric, value, base):
+        if value is None or base is None or metric not in TOLERANCE or base == 0:
+            return
+        change = (value - base) / base
+        if metric in HIGHER_IS_BETTER:
+            change = -change
+        if change > TOLERANCE[metric] and abs(value - base) > MIN_CHANGE.get(metric, 0.0):
+            regressions.append(f"{name}.{metric}: {base:.2f} -> {value:.2f} ({change * 100:+.0f}% worse)")
+
+    for name, row in results["micro"].items():
+        base = baseline["results"]["micro"].get(name)
+        if base:
+            check(name, "us_per_call", row["us_per_call"], base["us_per_call"])
+    for name, row in results.items():
+        base = baseline["results"].get(name)
+        if name == "micro" or not base:
+            continue
+        for metric, value in row.items():
+            check(name, metric, value, base.get(metric))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the robot control hot path")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per loop benchmark")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="fail unless there is a baseline to compare against")
+    args = parser.parse_args()
+
+    if args.compare and not args.save_baseline and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one first with: python control_benchmark.py --save-baseline")
+        sys.exit(2)
+
+    print(f"Benchmarking ({args.duration:.0f} s per loop run)...")
+    results = run_all(args.duration)
+    print_results(results)
+
+    document = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "interval": INTERVAL,
+        "results": results,
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("host") != document["host"]:
+        print(f"\nNote: baseline was recorded on {baseline.get('host')}, not this machine.")
+
+    regressions = compare(results, baseline)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for line in regressions:
+            print("  " + line)
+        sys.exit(1)
+    print("\nNo regressions against the baseline.")
@@ -0,0 +1,202 @@
+# control_engine.py — one fixed-rate loop driving every robot pairing
+import selectors
+import threading
+import time
+
+
+class FixedRateTicker:
+    """
+    Monotonic-deadline scheduler for a fixed-rate loop.
+
+    Deadlines are spaced exactly `interval` apart, so the time spent doing work
+    doesn't stretch the period. A tick that ends after its deadline counts as an
+    overrun, and the following ticks run back to back to catch up. Once the loop
+    is more than `max_catch_up` intervals behind, the missed deadlines are
+    skipped and counted instead of being replayed in a burst.
+    """
+
+    def __init__(self, interval, max_catch_up=2):
+        self.interval = interval
+        self.max_catch_up = max_catch_up
+        self.next_deadline = None
+        self.tick_deadline = None  # deadline of the tick currently running
+
+        self.ticks = 0
+        self.overruns = 0  # ticks whose work ran past their deadline
+        self.missed = 0  # deadlines skipped entirely
+        self.max_late = 0.0  # worst wake-up lateness, seconds
+        self.jitter = 0.0  # smoothed |period - interval|, seconds
+        self._avg_period = interval
+        self._last_wake = None
+
+    def start(self):
+        self.tick_deadline = time.monotonic()
+        self.next_deadline = self.tick_deadline + self.interval
+
+    def wait(self, idle=None):
+        """
+        Block until the next deadline. `idle(deadline)` can use the time for
+        other work (e.g. collecting acks); it should return by the deadline.
+        """
+        if self.next_deadline is None:
+            self.start()
+        deadline = self.next_deadline
+
+        now = time.monotonic()
+        if now > deadline:
+            self.overruns += 1
+        else:
+            if idle:
+                idle(deadline)
+            now = time.monotonic()
+            if now < deadline:
+                time.sleep(deadline - now)
+            now = time.monotonic()
+
+        self._record_wake(now, now - deadline)
+        self.tick_deadline = deadline
+
+        self.next_deadline = deadline + self.interval
+        behind = now - self.next_deadline
+        if behind > self.max_catch_up * self.interval:
+            skipped = int(behind // self.interval) + 1
+            self.missed += skipped
+            self.next_deadline += skipped * self.interval
+
+    def _record_wake(self, now, late):
+        self.ticks += 1
+        self.max_late = max(self.max_late, late)
+        if self._last_wake is not None:
+            period = now - self._last_wake
+            self._avg_period += (period - self._avg_period) / 16
+            self.jitter += (abs(period - self.interval) - self.jitter) / 16
+        self._last_wake = now
+
+    def achieved_hz(self):
+        return 1.0 / self._avg_period if self._avg_period > 0 else 0.0
+
+    def summary(self):
+        return {
+            "target_hz": 1.0 / self.interval,
+            "achieved_hz": self.achieved_hz(),
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "missed_deadlines": self.missed,
+            "tick_jitter_ms": self.jitter * 1000,
+            "max_late_ms": self.max_late * 1000,
+        }
+
+
+class ControlEngine:
+    """
+    Runs all active pairings from a single tick instead of one thread per pairing.
+
+    Each pairing owns a non-blocking UDP socket that is registered with a selector,
+    so acks are drained in the gap between ticks and never hold up a send.
+    Pairings are added/removed through a queue that the engine thread applies at
+    the start of each tick, so callers never touch the selector directly.
+    """
+
+    def __init__(self, get_killswitch, interval=0.01, pre_tick=None, table=None):
+        self.get_killswitch = get_killswitch  # returns the current killswitch value
+        self.interval = interval
+        self.pre_tick = pre_tick  # called once per tick before any pairing runs
+        self.table = table  # optional PairingTable computing every pairing's channels in one pass
+        self.ticker = FixedRateTicker(interval)
+
+        self.selector = selectors.DefaultSelector()
+        self.pairings = {}  # player_id -> RobotPairing (owned by the engine thread)
+
+        self._pending = []  # queued ("add"/"remove", pairing) changes
+        self._pending_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    # --------------------------
+    # Pairing management (safe from any thread)
+    # --------------------------
+    def add(self, pairing):
+        pairing.sock.setblocking(False)
+        with self._pending_lock:
+            self._pending.append(("add", pairing))
+
+    def remove(self, pairing):
+        with self._pending_lock:
+            self._pending.append(("remove", pairing))
+
+    def clear(self):
+        with self._pending_lock:
+            for pairing in self.pairings.values():
+                self._pending.append(("remove", pairing))
+
+    def _apply_pending(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+
+        for action, pairing in pending:
+            if action == "add":
+                self.pairings[pairing.player_id] = pairing
+                self.selector.register(pairing.sock, selectors.EVENT_READ, pairing)
+                if self.table is not None:
+                    self.table.add(pairing)
+            elif self.pairings.get(pairing.player_id) is pairing:
+                del self.pairings[pairing.player_id]
+                self.selector.unregister(pairing.sock)
+                if self.table is not None:
+                    self.table.remove(pairing.player_id)
+                pairing.stop()
+            else:
+                # removed before it was ever added
+                pairing.stop()
+
+    # --------------------------
+    # Main loop
+    # --------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread and threading.current_thread() != self._thread:
+            self._thread.join(timeout=1)
+        self._thread = None
+
+        # close anything still registered
+        self.clear()
+        self._apply_pending()
+
+    def _run(self):
+        self.ticker.start()
+        while not self._stop_event.is_set():
+            self._apply_pending()
+
+            if self.pre_tick:
+                self.pre_tick()
+
+            ks = self.get_killswitch()
+            deadline = self.ticker.tick_deadline
+            if self.table is not None and self.pairings:
+                ch1, ch2, ch3 = self.table.compute()
+                for pairing, c1, c2, c3 in zip(self.table.pairings, ch1, ch2, ch3):
+                    pairing.send_channels(c1, c2, c3, ks, deadline)
+            else:
+                for pairing in self.pairings.values():
+                    pairing.send_control(ks, deadline)
+
+            # Collect acks until the next tick is due
+            self.ticker.wait(self._drain_acks)
+
+    def _drain_acks(self, deadline):
+        while True:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return
+            if not self.pairings:
+                time.sleep(timeout)
+                return
+            for key, _ in self.selector.select(timeout):
+                key.data.receive_acks()
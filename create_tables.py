@@ -1,26 +1,10 @@
-import mysql.connector
 from mysql.connector import Error
-from dotenv import load_dotenv
-import os
 
-#load .env values
-load_dotenv()
-MYSQL_USER = os.getenv("MYSQL_USER")
-MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
-MYSQL_HOST = os.getenv("MYSQL_HOST")
-TARGET_DB = os.getenv("TARGET_DB")
+from db_pool import get_connection, TARGET_DB
 
 CREATE_DB_PATH = 'create_tables.sql'
 FILL_DATA_PATH = 'fill_tables.sql'
 
-def get_connection(database=None):
-    return mysql.connector.connect(
-        host=MYSQL_HOST,
-        user=MYSQL_USER,
-        password=MYSQL_PASSWORD,
-        database=TARGET_DB
-    )
-
 def execute_sql_file(cursor, sql_file_path):
     with open(sql_file_path, 'r') as file:
         sql_commands = file.read()
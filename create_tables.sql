@@ -43,3 +43,37 @@ CREATE TABLE soccer_robot (
     CH4_INVERT BOOLEAN DEFAULT 0
 );
 
+
+-- match history, written behind the game by match_history.py (MATCH is a reserved word, hence game_match)
+CREATE TABLE game_match (
+    match_id CHAR(32) PRIMARY KEY,
+    arena VARCHAR(32) NOT NULL,
+    started_at DATETIME(3) NOT NULL,
+    ended_at DATETIME(3) NOT NULL,
+    duration_ms INT NOT NULL,
+    end_reason ENUM('TIMER', 'KO', 'WINNER', 'ABORTED') NOT NULL,
+    winner VARCHAR(20)
+);
+
+CREATE TABLE match_participant (
+    match_id CHAR(32) NOT NULL,
+    player VARCHAR(2) NOT NULL,
+    robot_id int NOT NULL,
+    PRIMARY KEY (match_id, player, robot_id),
+    FOREIGN KEY (match_id) REFERENCES game_match(match_id)
+);
+
+CREATE TABLE link_stats (
+    match_id CHAR(32) NOT NULL,
+    robot_id int NOT NULL,
+    sent INT NOT NULL,
+    acked INT NOT NULL,
+    lost INT NOT NULL,
+    loss_rate FLOAT,
+    rtt_p50_ms FLOAT,
+    rtt_p95_ms FLOAT,
+    rtt_p99_ms FLOAT,
+    send_jitter_ms FLOAT,
+    PRIMARY KEY (match_id, robot_id),
+    FOREIGN KEY (match_id) REFERENCES game_match(match_id)
+);
@@ -0,0 +1,41 @@
+# db_async.py — runs database calls on worker threads and hands the results back to the Tk main thread
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TkDatabaseWorker:
+    """
+    Runs blocking calls (db_handler lookups, pairing) on a small thread pool
+    so the operator UI never waits on the database. Results and errors are
+    delivered on the Tk thread through root.after, so callbacks can touch
+    widgets directly.
+    """
+
+    def __init__(self, root, workers=2):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+
+    def call(self, fn, *args, on_done=None, on_error=None):
+        """Run fn(*args) on a worker; on_done(result) or on_error(exception) then runs on the Tk thread."""
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(lambda f: self._deliver(f, fn, on_done, on_error))
+        return future
+
+    def _deliver(self, future, fn, on_done, on_error):
+        error = future.exception()
+        if error is not None:
+            if on_error:
+                self._after(on_error, error)
+            else:
+                print(f"Error in {getattr(fn, '__name__', fn)}: {error}")
+        elif on_done:
+            self._after(on_done, future.result())
+
+    def _after(self, callback, value):
+        try:
+            self.root.after(0, callback, value)
+        except (RuntimeError, tk.TclError):
+            pass  # the Tk window is already gone
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -3,74 +3,145 @@ import mysql.connector
 from mysql.connector import Error
 from dotenv import load_dotenv
 import os
+import json
+import threading
 from tabulate import tabulate
 
+import db_local
+import db_pool
+
 # Load environment variables
 load_dotenv()
-MYSQL_USER = os.getenv("MYSQL_USER")
-MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
-MYSQL_HOST = os.getenv("MYSQL_HOST")
-TARGET_DB = os.getenv("TARGET_DB")
+# "mysql", or "sqlite" to run from the local copy in db_local.py and sync it with MySQL in the background
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql").lower()
+# Optional JSON list of robot rows (e.g. written by robot_simulator.py --fixture) served alongside the database
+ROBOT_FIXTURE = os.getenv("ROBOT_FIXTURE")
+
+_fixture_robots = None
+
+# robot JOIN robot_type, keyed by robot_id (as a string); loaded on first use and dropped by the edit functions
+_roster = None
+_roster_lock = threading.Lock()
+
+DB_ERRORS = (mysql.connector.Error, db_local.Error)
+INTEGRITY_ERRORS = (mysql.connector.IntegrityError, db_local.IntegrityError)
+
+
+def get_fixture_robots():
+    """Fixture rows keyed by robot_id (as a string), loaded once. Empty if ROBOT_FIXTURE isn't set."""
+    global _fixture_robots
+    if _fixture_robots is None:
+        _fixture_robots = {}
+        if ROBOT_FIXTURE:
+            try:
+                with open(ROBOT_FIXTURE) as f:
+                    _fixture_robots = {str(row['robot_id']): row for row in json.load(f)}
+                print(f"Loaded {len(_fixture_robots)} robots from fixture {ROBOT_FIXTURE}")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Could not load robot fixture {ROBOT_FIXTURE}: {e}")
+    return _fixture_robots
+
+
+def _robot_info_from_row(row):
+    return (
+        row['local_ip'],
+        int(row['network_port']),
+        [bool(row['CH1_INVERT']), bool(row['CH2_INVERT']), bool(row['CH3_INVERT']), bool(row['INVERT_DRIVE'])],
+        [float(row['steering_limit']), float(row['forward_limit']), float(row['weapon_limit']), bool(row['bidirectional_weapon'])]
+    )
 
-def get_robot_list(already_connected=None):
+
+def get_robot_list(already_connected=None, cached_only=False):
+    """
+    Robots that aren't in already_connected. With cached_only, answer from
+    memory without touching the database (the roster may still be empty).
+    """
     if already_connected is None:
         already_connected = []
 
-    try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT robot_id, robot_type, color FROM robot")
-        result = cursor.fetchall()  # fetch all rows
-        cursor.close()
-        conn.close()
+    # simulated robots from the fixture are listed first
+    fixture = [{'robot_id': row['robot_id'], 'robot_type': row['robot_type'], 'color': row['color']}
+               for robot_id, row in get_fixture_robots().items()
+               if robot_id not in {str(bot) for bot in already_connected}]
 
-        if result:
-            # Filter out already connected robots
-            filtered = [r for r in result if r['robot_id'] not in already_connected]
+    roster = get_roster(cached_only)
+    # Filter out already connected robots
+    filtered = fixture + [{'robot_id': r['robot_id'], 'robot_type': r['robot_type'], 'color': r['color']}
+                          for r in roster.values() if r['robot_id'] not in already_connected]
 
-            # Return list of dicts: each dict has 'id', 'type', 'color'
-            return filtered if filtered else None
-        else:
-            return None
-    except mysql.connector.Error as err:
-        print("Database error:", err)
-        return None
+    # Return list of dicts: each dict has 'id', 'type', 'color'
+    return filtered if filtered else None
 
 
-def get_connection():
-    return mysql.connector.connect(
-        host=MYSQL_HOST,
-        user=MYSQL_USER,
-        password=MYSQL_PASSWORD,
-        database=TARGET_DB
-    )
+def get_roster(cached_only=False):
+    """
+    Every robot joined with its type, keyed by robot_id (as a string). Read
+    from the database once, then from memory. With cached_only, never
+    queries: empty until something has loaded it.
+    """
+    if cached_only:
+        return _roster if _roster is not None else {}
+    with _roster_lock:
+        if _roster is None:
+            _load_roster()
+        return _roster if _roster is not None else {}
 
 
-def get_robot_info(robot_id):
+def invalidate_roster():
+    """Drop the cached roster; the next lookup reloads it. Called after every robot/type edit."""
+    global _roster
+    with _roster_lock:
+        _roster = None
+
+
+def _load_roster():
+    # caller holds _roster_lock
+    global _roster
     try:
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute(
-            "SELECT local_ip, network_port, robot_type, color, CH1_INVERT, CH2_INVERT, CH3_INVERT, INVERT_DRIVE, " \
+            "SELECT robot_id, local_ip, network_port, robot_type, color, CH1_INVERT, CH2_INVERT, CH3_INVERT, INVERT_DRIVE, " \
             "steering_limit, forward_limit, weapon_limit, bidirectional_weapon FROM robot " \
-            "JOIN robot_type ON robot.robot_type = robot_type.bot_type WHERE robot_id = %s",
-            (robot_id,)
+            "JOIN robot_type ON robot.robot_type = robot_type.bot_type ORDER BY robot_id"
         )
-        result = cursor.fetchone()
+        rows = cursor.fetchall()
         cursor.close()
         conn.close()
-        if result:
-            return (
-                result['local_ip'],
-                int(result['network_port']),
-                [bool(result['CH1_INVERT']), bool(result['CH2_INVERT']), bool(result['CH3_INVERT']), bool(result['INVERT_DRIVE'])],
-                [float(result['steering_limit']), float(result['forward_limit']), float(result['weapon_limit']), bool(result['bidirectional_weapon'])]
-            )
-        else:
-            return None
-    except mysql.connector.Error as err:
-        print("Database error:", err)
-        return None
+        _roster = {str(row['robot_id']): row for row in rows}
+    except DB_ERRORS as err:
+        print("Database error:", err)  # left unloaded, so the next lookup tries again
+
+
+def get_connection():
+    if DB_BACKEND == "sqlite":
+        return db_local.get_connection()
+    # pooled, with short connect/query timeouts (see db_pool.py); conn.close() hands it back to the pool
+    return db_pool.get_connection()
+
+
+def sync_database():
+    """With the sqlite backend, push local edits to MySQL and pull its changes. Does nothing with mysql."""
+    if DB_BACKEND != "sqlite":
+        return True
+    in_sync = db_local.sync()
+    invalidate_roster()
+    return in_sync
+
+
+def get_robot_info(robot_id):
+    row = get_fixture_robots().get(str(robot_id))
+    if row:
+        return _robot_info_from_row(row)
+
+    row = get_roster().get(str(robot_id))
+    if row is None and _roster is not None:
+        # may have been added to the database by something other than this module
+        invalidate_roster()
+        row = get_roster().get(str(robot_id))
+    if row:
+        return _robot_info_from_row(row)
+    return None
 
 
 def add_robot():
@@ -94,9 +165,10 @@ def add_robot():
         conn.commit()
         cursor.close()
         conn.close()
+        invalidate_roster()
         print(f"Robot '{robot_id}' added successfully.")
 
-    except mysql.connector.IntegrityError:
+    except INTEGRITY_ERRORS:
         print("Error: Robot ID already exists.")
     except ValueError:
         print("Invalid number input.")
@@ -114,6 +186,7 @@ def remove_robot():
             print(f"No robot found with ID '{robot_id}'.")
         else:
             conn.commit()
+            invalidate_roster()
             print(f"Robot '{robot_id}' removed successfully.")
         cursor.close()
         conn.close()
@@ -168,6 +241,7 @@ def edit_robot():
         """, (ip, port, robot_type, color, invert_drive, ch1_inv, ch2_inv, ch3_inv, robot_id))
 
         conn.commit()
+        invalidate_roster()
         print(f"Robot '{robot_id}' updated successfully.")
         cursor.close()
         conn.close()
@@ -310,6 +384,7 @@ def edit_type():
         """, (steer_limit, forw_limit, weap_limit, bidir_weap, robot_id))
 
         conn.commit()
+        invalidate_roster()
         print(f"Robot type'{robot_id}' updated successfully.")
         cursor.close()
         conn.close()
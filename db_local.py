@@ -0,0 +1,359 @@
+# db_local.py — embedded SQLite copy of the ROBOT_CITY database, synced with MySQL when it's reachable
+#
+#   python db_local.py            sync now (push local edits to MySQL, then pull MySQL's tables)
+#   python db_local.py --init     (re)create the local database from MySQL, or fill_tables.sql if MySQL is down
+#
+# Select it with DB_BACKEND=sqlite in .env. db_handler then reads and writes the
+# local file (startup and pairing never wait on the network), and every edit is
+# logged by triggers until sync() has pushed it to MySQL.
+import argparse
+import os
+import sqlite3
+import threading
+
+import mysql.connector
+from dotenv import load_dotenv
+
+import db_pool
+
+load_dotenv()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "robot_city.sqlite")
+FILL_DATA_PATH = "fill_tables.sql"
+
+# create_tables.sql in SQLite terms (ENUMs become CHECK constraints)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS robot_type (
+    bot_type VARCHAR(20) PRIMARY KEY,
+    steering_limit FLOAT DEFAULT 1.0,
+    forward_limit FLOAT DEFAULT 1.0,
+    weapon_limit FLOAT DEFAULT 0.4,
+    bidirectional_weapon BOOLEAN DEFAULT 0,
+    CHECK (steering_limit >= 0.0 AND steering_limit <= 1.0),
+    CHECK (forward_limit >= 0.0 AND forward_limit <= 1.0),
+    CHECK (weapon_limit >= 0.0 AND weapon_limit <= 1.0)
+);
+
+CREATE TABLE IF NOT EXISTS robot (
+    robot_id int PRIMARY KEY,
+    local_ip VARCHAR(13) NOT NULL,
+    network_port SMALLINT NOT NULL,
+    robot_type VARCHAR(20) NOT NULL,
+    color TEXT NOT NULL CHECK (color IN ('YELLOW', 'BLUE', 'GREEN', 'ORANGE', 'PINK')),
+    CH1_INVERT BOOLEAN DEFAULT 0,
+    CH2_INVERT BOOLEAN DEFAULT 0,
+    CH3_INVERT BOOLEAN DEFAULT 0,
+    INVERT_DRIVE BOOLEAN DEFAULT 0,
+    FOREIGN KEY (robot_type) REFERENCES robot_type(bot_type)
+);
+
+CREATE TABLE IF NOT EXISTS soccer_robot (
+    robot_id int PRIMARY KEY,
+    local_ip VARCHAR(13) NOT NULL,
+    network_port SMALLINT NOT NULL,
+    color TEXT NOT NULL CHECK (color IN ('BLUE', 'GREEN')),
+    CH1_INVERT BOOLEAN DEFAULT 0,
+    CH2_INVERT BOOLEAN DEFAULT 0,
+    CH3_INVERT BOOLEAN DEFAULT 0,
+    CH4_INVERT BOOLEAN DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS game_match (
+    match_id CHAR(32) PRIMARY KEY,
+    arena VARCHAR(32) NOT NULL,
+    started_at DATETIME(3) NOT NULL,
+    ended_at DATETIME(3) NOT NULL,
+    duration_ms INT NOT NULL,
+    end_reason TEXT NOT NULL CHECK (end_reason IN ('TIMER', 'KO', 'WINNER', 'ABORTED')),
+    winner VARCHAR(20)
+);
+
+CREATE TABLE IF NOT EXISTS match_participant (
+    match_id CHAR(32) NOT NULL,
+    player VARCHAR(2) NOT NULL,
+    robot_id int NOT NULL,
+    PRIMARY KEY (match_id, player, robot_id),
+    FOREIGN KEY (match_id) REFERENCES game_match(match_id)
+);
+
+CREATE TABLE IF NOT EXISTS link_stats (
+    match_id CHAR(32) NOT NULL,
+    robot_id int NOT NULL,
+    sent INT NOT NULL,
+    acked INT NOT NULL,
+    lost INT NOT NULL,
+    loss_rate FLOAT,
+    rtt_p50_ms FLOAT,
+    rtt_p95_ms FLOAT,
+    rtt_p99_ms FLOAT,
+    send_jitter_ms FLOAT,
+    PRIMARY KEY (match_id, robot_id),
+    FOREIGN KEY (match_id) REFERENCES game_match(match_id)
+);
+
+-- rows edited locally and not yet pushed to MySQL
+CREATE TABLE IF NOT EXISTS sync_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tbl TEXT NOT NULL,
+    pk TEXT NOT NULL
+);
+"""
+
+# synced tables, parents first, with their primary key column (match history stays local; it is append-only)
+TABLES = (("robot_type", "bot_type"), ("robot", "robot_id"), ("soccer_robot", "robot_id"))
+
+_init_lock = threading.Lock()
+_initialized = False
+_sync_lock = threading.Lock()
+
+Error = sqlite3.Error
+IntegrityError = sqlite3.IntegrityError
+
+
+def _log_triggers():
+    statements = []
+    for table, pk in TABLES:
+        for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_log AFTER {event} ON {table} "
+                f"BEGIN INSERT INTO sync_log (tbl, pk) VALUES ('{table}', {row}.{pk}); END;"
+            )
+        # a primary key change moves the row: the old key has to be deleted remotely
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_rekey_log AFTER UPDATE OF {pk} ON {table} "
+            f"WHEN OLD.{pk} IS NOT NEW.{pk} "
+            f"BEGIN INSERT INTO sync_log (tbl, pk) VALUES ('{table}', OLD.{pk}); END;"
+        )
+    return "\n".join(statements)
+
+
+class LocalCursor:
+    """
+    sqlite3 cursor with the mysql.connector surface db_handler uses:
+    %s placeholders and optional dict rows.
+    """
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self.dictionary = dictionary
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, query, params=()):
+        self._cursor.execute(query.replace("%s", "?"), params)
+
+    def executemany(self, query, seq_of_params):
+        self._cursor.executemany(query.replace("%s", "?"), seq_of_params)
+
+    def _convert(self, row):
+        if row is None or not self.dictionary:
+            return row
+        return dict(zip((d[0] for d in self._cursor.description), row))
+
+    def fetchone(self):
+        return self._convert(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+
+class LocalConnection:
+    """A connection to the local database that db_handler can use in place of a MySQL one."""
+
+    def __init__(self, path=SQLITE_PATH):
+        self._conn = sqlite3.connect(path, timeout=db_pool.DB_CONNECT_TIMEOUT)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def cursor(self, dictionary=False):
+        return LocalCursor(self._conn.cursor(), dictionary)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+def get_connection():
+    """A connection to the local database, creating and filling it on first use."""
+    ensure_database()
+    return LocalConnection()
+
+
+def ensure_database(path=SQLITE_PATH):
+    """Create the local database if it doesn't exist yet: from MySQL if reachable, otherwise from fill_tables.sql."""
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+        new = not os.path.exists(path)
+        conn = sqlite3.connect(path)
+        conn.executescript("PRAGMA journal_mode = WAL;" + SCHEMA + _log_triggers())
+        conn.close()
+        _initialized = True
+    if new:
+        print(f"Created local database {path}")
+        if not pull_from_mysql(path):
+            seed_from_file(path)
+
+
+def seed_from_file(path=SQLITE_PATH, sql_path=FILL_DATA_PATH):
+    """Fill an empty local database with the default robots in fill_tables.sql. Not logged for sync."""
+    try:
+        with open(sql_path) as f:
+            commands = f.read().split(";")
+    except OSError as e:
+        print(f"Could not read {sql_path}: {e}")
+        return
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            for command in commands:
+                command = command.strip()
+                if command and not command.upper().startswith("USE "):
+                    conn.execute(command)
+            conn.execute("DELETE FROM sync_log")  # defaults, not edits: MySQL's rows win at the next sync
+        print(f"Filled local database from {sql_path}")
+    except sqlite3.Error as e:
+        print(f"Could not fill local database from {sql_path}: {e}")
+    finally:
+        conn.close()
+
+
+def pending_changes(path=SQLITE_PATH):
+    """Number of local edits not yet pushed to MySQL."""
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(DISTINCT tbl || ':' || pk) FROM sync_log").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def push_to_mysql(path=SQLITE_PATH):
+    """Apply logged local edits to MySQL. Returns True when nothing is left to push."""
+    local = sqlite3.connect(path)
+    local.row_factory = sqlite3.Row
+    try:
+        log = local.execute("SELECT id, tbl, pk FROM sync_log ORDER BY id").fetchall()
+        if not log:
+            return True
+        last_id = log[-1]["id"]
+        changed = {table: [] for table, _ in TABLES}
+        for entry in log:
+            if entry["pk"] not in changed[entry["tbl"]]:
+                changed[entry["tbl"]].append(entry["pk"])
+
+        upserts, deletes = [], []
+        for table, pk in TABLES:
+            for key in changed[table]:
+                row = local.execute(f"SELECT * FROM {table} WHERE {pk} = ?", (key,)).fetchone()
+                if row is None:
+                    deletes.append((table, pk, key))
+                else:
+                    upserts.append((table, dict(row)))
+
+        conn = db_pool.get_connection()
+        try:
+            cursor = conn.cursor()
+            for table, row in upserts:  # parents first
+                columns = ", ".join(row)
+                values = ", ".join(["%s"] * len(row))
+                updates = ", ".join(f"{c} = VALUES({c})" for c in row)
+                cursor.execute(f"INSERT INTO {table} ({columns}) VALUES ({values}) ON DUPLICATE KEY UPDATE {updates}",
+                               tuple(row.values()))
+            for table, pk, key in reversed(deletes):  # children first
+                cursor.execute(f"DELETE FROM {table} WHERE {pk} = %s", (key,))
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+        with local:
+            local.execute("DELETE FROM sync_log WHERE id <= ?", (last_id,))
+        print(f"Pushed {len(upserts) + len(deletes)} local changes to MySQL")
+        return True
+    except mysql.connector.Error as err:
+        print("Could not push local changes to MySQL:", err)
+        return False
+    finally:
+        local.close()
+
+
+def pull_from_mysql(path=SQLITE_PATH):
+    """Replace the local tables with MySQL's. Skipped (returns False) while there are unpushed local edits."""
+    try:
+        conn = db_pool.get_connection()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            tables = {}
+            for table, _ in TABLES:
+                cursor.execute(f"SELECT * FROM {table}")
+                tables[table] = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+    except mysql.connector.Error as err:
+        print("Could not read the database from MySQL:", err)
+        return False
+
+    local = sqlite3.connect(path, isolation_level=None)
+    try:
+        local.execute("BEGIN IMMEDIATE")  # no local edit can slip in between the check and the copy
+        if local.execute("SELECT COUNT(*) FROM sync_log").fetchone()[0]:
+            local.execute("ROLLBACK")
+            print("Local edits not pushed yet; keeping the local database")
+            return False
+        for table, _ in reversed(TABLES):
+            local.execute(f"DELETE FROM {table}")
+        for table, _ in TABLES:
+            for row in tables[table]:
+                local.execute(f"INSERT INTO {table} ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                              tuple(row.values()))
+        local.execute("DELETE FROM sync_log")
+        local.execute("COMMIT")
+        print(f"Local database updated from MySQL ({len(tables['robot'])} robots)")
+        return True
+    except sqlite3.Error as e:
+        if local.in_transaction:
+            local.execute("ROLLBACK")
+        print("Could not update the local database:", e)
+        return False
+    finally:
+        local.close()
+
+
+def sync(path=SQLITE_PATH):
+    """Push local edits to MySQL, then refresh from it. Returns True if the local copy now matches MySQL."""
+    ensure_database(path)
+    with _sync_lock:
+        return push_to_mysql(path) and pull_from_mysql(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync the local SQLite database with MySQL")
+    parser.add_argument("--init", action="store_true", help="delete and recreate the local database")
+    parser.add_argument("--path", default=SQLITE_PATH, help="local database file")
+    args = parser.parse_args()
+
+    if args.init:
+        if os.path.exists(args.path) and pending_changes(args.path):
+            response = input(f"{args.path} has local edits that were never pushed to MySQL. Discard them? (y/n): ")
+            if response.strip().lower() != "y":
+                raise SystemExit("Operation cancelled.")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.path + suffix):
+                os.remove(args.path + suffix)
+        ensure_database(args.path)
+    else:
+        print("In sync with MySQL" if sync(args.path) else "Not in sync; local edits are kept until the next sync")
@@ -0,0 +1,132 @@
+# db_pool.py — pooled MySQL connections with short timeouts, shared by db_handler and create_tables
+import os
+import threading
+import time
+
+import mysql.connector
+from dotenv import load_dotenv
+
+load_dotenv()
+MYSQL_USER = os.getenv("MYSQL_USER")
+MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
+MYSQL_HOST = os.getenv("MYSQL_HOST")
+TARGET_DB = os.getenv("TARGET_DB")
+
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "2"))  # seconds, for connecting and for each query
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))  # idle connections kept open
+DB_RETRY_INTERVAL = float(os.getenv("DB_RETRY_INTERVAL", "5"))  # after a failed connect, fail fast for this long
+HEALTH_CHECK_IDLE = 10.0  # ping connections that have been idle longer than this before reusing them
+
+
+class DatabaseUnavailable(mysql.connector.errors.InterfaceError):
+    """Raised without waiting while the database is known to be down."""
+
+
+class PooledConnection:
+    """
+    A pooled mysql.connector connection. Use it exactly like the connection
+    itself; close() hands it back to the pool instead of disconnecting.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+
+class ConnectionPool:
+    """
+    Keeps up to `size` idle MySQL connections for reuse.
+
+    A connection idle longer than HEALTH_CHECK_IDLE is pinged before it's
+    handed out and replaced if the server dropped it. Connects and queries
+    time out after `timeout` seconds. After a failed connect the pool fails
+    fast with DatabaseUnavailable for `retry_interval` seconds instead of
+    making every caller wait out the timeout again.
+    """
+
+    def __init__(self, size=DB_POOL_SIZE, timeout=DB_CONNECT_TIMEOUT, retry_interval=DB_RETRY_INTERVAL, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.connect_args = connect_args
+
+        self._idle = []  # (returned at, connection)
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+        self._last_error = None
+
+    def get_connection(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                returned_at, conn = self._idle.pop()
+            if time.monotonic() - returned_at < HEALTH_CHECK_IDLE or self._healthy(conn):
+                return PooledConnection(self, conn)
+            self._discard(conn)
+        return PooledConnection(self, self._connect())
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()  # don't carry an open read snapshot over to the next user
+        except mysql.connector.Error:
+            self._discard(conn)
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((time.monotonic(), conn))
+                return
+        self._discard(conn)
+
+    def clear(self):
+        """Close every idle connection (e.g. after the server restarted)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, conn in idle:
+            self._discard(conn)
+
+    def _connect(self):
+        now = time.monotonic()
+        if now < self._down_until:
+            raise DatabaseUnavailable(f"database unavailable ({self._last_error}); "
+                                      f"retrying in {self._down_until - now:.1f} s")
+        try:
+            conn = mysql.connector.connect(connection_timeout=self.timeout, **self.connect_args)
+        except mysql.connector.Error as err:
+            self._last_error = err
+            self._down_until = time.monotonic() + self.retry_interval
+            raise
+        self._down_until = 0.0
+        return conn
+
+    @staticmethod
+    def _healthy(conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            return False
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+pool = ConnectionPool(host=MYSQL_HOST, user=MYSQL_USER, password=MYSQL_PASSWORD, database=TARGET_DB)
+
+
+def get_connection():
+    """A pooled connection to TARGET_DB; close() returns it to the pool."""
+    return pool.get_connection()
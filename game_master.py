@@ -1,158 +1,183 @@
 #example desktop shortcut
 #Exec=env DISPLAY=:0 GTK_IM_MODULE=xim XDG_SESSION_TYPE=x11 XMODIFIERS= /usr/bin/python3 /home/john/ROBOT_CITY/game_master.py -gui
 
-import pygame
-import socket
-import struct
-import threading
 import time
-import platform
-import math
+_import_start = time.perf_counter()  # for the startup report
+
+import threading
 import string
 import json
-import glob
 from dotenv import load_dotenv
 import os
-import db_handler
 import argparse
 import sys
 import signal
-from LightClockHandler import LightClockHandler
-import tkinter as tk
-from tkinter import simpledialog, messagebox
-from sound_effects import SoundEffects
+from match_history import stop_writer
+from startup_timer import StartupTimer
+# pygame, tkinter, the database layer and the control stack are imported where they're first used,
+# so terminal commands that only touch the database never load SDL, OLA or Tk (see start_arena)
 
-
-pygame.init()
-pygame.joystick.init()
+_import_end = time.perf_counter()
 
 
 controller_map_json_path = "controller_map.json"
 
 def timer_stop_game():
-    global killswitch_value
-    with lock:
-        killswitch_value = 0
-    print("Game stopped (killswitch=0)")
-    sound_effects.buzzer()
+    if sound_effects is None:
+        print("Sound effects still loading; no buzzer")
+        return
+    sound_effects.buzzer()  # scheduled on its own channel; doesn't hold up the clock's monitor thread
 
-light_clock_handler = LightClockHandler(on_match_end=timer_stop_game)
-sound_effects = SoundEffects()
+def show_sound_latency():
+    if sound_effects is None:
+        print("Sound effects not loaded (they load with the arena)")
+        return
+    summary = sound_effects.cues.latency_summary()
+    if not summary:
+        print("No sound cues played yet")
+        return
+    print(f"Sound cues: {summary['cues']} played, started late by {summary['median_ms']:.1f} ms median, {summary['max_ms']:.1f} ms worst")
+    for name, late_ms in summary["last_ms"].items():
+        print(f"\t{name}: {late_ms:.1f} ms late last time")
+
+sound_effects = None  # SoundEffects, loaded in the background by start_arena()
 
-CONTROLLER_MAP = {}
 REVERSE_MAP = {}
 
 SEND_INTERVAL = 0.01  # seconds
-DEAD_ZONE = 25
-
-# global values
-killswitch_value = 0
-pairings = {}  # player_id -> RobotControllerThread
-lock = threading.Lock()
+ADAPTIVE_SEND_RATE = True  # heartbeat-only between matches, send-on-change during matches (see SendPolicy)
 
+# single place that reads the controllers; pairings only read its snapshots (created by start_arena())
+joystick_sampler = None
 
-# Platform dependent axis mapping for right stick and triggers
-if platform.system() == "Linux":
-    AXIS_X = 3 #3
-    AXIS_Y = 1 #1
-    AXIS_LEFT_TRIGGER = 2 #2
-    AXIS_RIGHT_TRIGGER = 5 #5
-    
-else:
-    AXIS_X = 2
-    AXIS_Y = 3
-    AXIS_LEFT_TRIGGER = 4
-    AXIS_RIGHT_TRIGGER = 5
-
-
-
-def scale_axis_drive(value, flip, limit):
-    if value < -1.0 or value > 1.0:
-        print("Axis value out of range:", value)
-        value = 0.0
-    if flip:
-        #return 2000 - int((value + 1) * 500 * limit)
-        return int((-value) * 500 * limit) + 1500
-    else:
-        #return int((value + 1) * 500 * limit) + 1000
-        return int(value * 500 * limit) + 1500
-
-def scale_axis_spinner(value, ch3_invert, weapon_scale, bidirectional):
-    # Normalize trigger axis from [-1..1] to [0..1]
-    if value < -1.0 or value > 1.0:
-        print('CH3 OUT OF BOUNDS!')
-        value = 0.0
-    norm_val = (value + 1) / 2
-
-    if ch3_invert:
-        if(bidirectional):
-            return 1500 - int(norm_val * 500 * weapon_scale)
-        else:
-            return 2000 - int(norm_val * 1000 * weapon_scale)
-    else:
-        if(bidirectional):
-            return 1500 + int(norm_val * 500 * weapon_scale)
+# global values
+# The first arena in arenas.json (or the single default arena) runs in this process. Its killswitch,
+# match state, pairings and controller map live in arena.state (game_state); read them via snapshot().
+# Other arenas run in their own arena_node.py processes and are reached through ArenaClients.
+# All of it is brought up by start_arena(): at startup for the GUI, on the first pairing or match
+# command in terminal mode.
+arena_configs = []
+arena = None
+game_state = None
+remote_arenas = {}  # name -> ArenaClient, filled in by start_remote_arenas()
+node_processes = []  # arena_node.py processes started on this machine
+
+
+def create_arena():
+    # connects to the clock and the lights (OLA)
+    global arena, game_state
+    import db_handler
+    from arena import Arena
+    arena = Arena(arena_configs[0], joystick_sampler, db_handler.get_robot_info,
+                  send_interval=SEND_INTERVAL, adaptive=ADAPTIVE_SEND_RATE, on_match_end=timer_stop_game)
+    game_state = arena.state
+    return arena
+
+def load_sound_effects():
+    global sound_effects
+    from sound_effects import SoundEffects
+    sound_effects = SoundEffects()
+
+def init_controllers():
+    # only the SDL parts the controllers need (events come through the video subsystem); the mixer is SoundEffects' job
+    import pygame
+    from joystick_sampler import controller_index
+    pygame.display.init()
+    pygame.joystick.init()
+    controller_index.refresh()
+
+def start_arena(startup, use_engine=False):
+    """
+    Bring up this process's arena and everything pairing needs: clock and lights, controllers,
+    sound effects and the control loop. Remote arenas are connected in the background.
+    """
+    global arena_configs, joystick_sampler
+    from arena import load_arena_configs
+    from arena_node import pin_to_cpus
+    from joystick_sampler import JoystickSampler, DEFAULT_AXES
+
+    arena_configs = load_arena_configs()
+    pin_to_cpus(arena_configs[0].cpus)  # before the arena's threads start, so they inherit it
+    joystick_sampler = JoystickSampler(DEFAULT_AXES)
+
+    arena_ready = startup.background("arena (clock, lights)", create_arena)
+    with startup.step("pygame + controllers"):
+        init_controllers()
+    startup.background("sound effects", load_sound_effects)  # after SDL is up: its subsystems aren't initialised concurrently
+    arena_ready.result()
+
+    with startup.step("control loop"):
+        if use_engine:
+            from control_engine import ControlEngine
+            from channel_mixer import PairingTable
+            arena.use_engine(ControlEngine(get_killswitch, interval=SEND_INTERVAL, pre_tick=joystick_sampler.sample,
+                                           table=PairingTable(joystick_sampler)))
         else:
-            return 1000 + int(norm_val * 1000 * weapon_scale)
+            joystick_sampler.start(SEND_INTERVAL)
+        arena.start()
+    with startup.step("controller map"):
+        load_controller_map()
+    startup.mark("ready for pairing")
 
-def check_dead_zone(a, b):
-    dist = math.sqrt((1500 - a) ** 2 + (1500 - b) ** 2)
-    if dist <= DEAD_ZONE:
-        return 1500, 1500
-    return a, b
+    startup.background("remote arenas", start_remote_arenas)
 
 def get_robot_info(robot_id):
+    import db_handler
     return db_handler.get_robot_info(robot_id)
 
+def warm_database():
+    # load the roster so the first pair is a memory lookup, then catch the local copy up with MySQL (sqlite backend)
+    import db_handler
+    db_handler.get_roster()
+    db_handler.sync_database()
+
+def sync_database_in_background():
+    import db_handler
+    threading.Thread(target=db_handler.sync_database, daemon=True).start()
+
+# terminal commands that only need the database: command -> (db_handler function, sync the local copy afterwards)
+DB_COMMANDS = {
+    "add robot": ("add_robot", True),
+    "remove robot": ("remove_robot", True),
+    "edit robot": ("edit_robot", True),
+    "show robots": ("show_robots", False),
+    "show types": ("show_types", False),
+    "edit type": ("edit_type", True),
+    "sync db": ("sync_database", False),
+}
+
+def run_db_command(cmd):
+    import db_handler
+    name, sync = DB_COMMANDS[cmd]
+    getattr(db_handler, name)()
+    if sync:
+        sync_database_in_background()
+
+def publish_controller_map(controller_map):
+    """Make a letters → pygame index map live for the sampler and everyone reading game_state."""
+    arena.publish_controller_map(controller_map)
+
 def update_runtime_controller_map(json_file=controller_map_json_path):
     """
-    Updates CONTROLLER_MAP to map letters → pygame indices using UIDs from JSON.
+    Updates the controller map (letters → pygame indices) using UIDs from JSON.
     """
-    global CONTROLLER_MAP
-    CONTROLLER_MAP = {}
+    from joystick_sampler import map_controllers
+    controller_map = {}
     
     try:
         with open(json_file, "r") as f:
             letter_to_uid = json.load(f)
     except FileNotFoundError:
         print(f"No controller map JSON found at {json_file}. Using empty map.")
+        publish_controller_map(controller_map)
         return
 
-    for i in range(pygame.joystick.get_count()):
-        uid = get_unique_controller_id(i)
-        for letter, mapped_uid in letter_to_uid.items():
-            if uid == mapped_uid:
-                CONTROLLER_MAP[letter] = i  # runtime index
-                break
-
-    print("Runtime CONTROLLER_MAP updated:", CONTROLLER_MAP)
-
-
+    controller_map = map_controllers(letter_to_uid)  # letters → runtime index
+    publish_controller_map(controller_map)
+    print("Runtime CONTROLLER_MAP updated:", controller_map)
 
 
 
-def get_unique_controller_id(js_index):
-    """Return a persistent unique ID for the controller at pygame index js_index."""
-    js = pygame.joystick.Joystick(js_index)
-    js.init()
-    name = js.get_name()
-
-    # Look for symlinks in /dev/input/by-id/
-    by_id_paths = glob.glob("/dev/input/by-id/*-joystick")
-    for path in by_id_paths:
-        try:
-            real_path = os.path.realpath(path)
-            dev_num = int(real_path.replace("/dev/input/js", ""))
-            if dev_num == js_index:
-                # Extract serial from symlink name
-                serial = os.path.basename(path).replace("usb-", "").replace("-joystick", "")
-                return f"{name}_{serial}"
-        except:
-            continue
-
-    # fallback
-    return f"{name}_{js_index}"
-
 
 
 def calibrate_controller_order(num_controllers=8):
@@ -161,6 +186,8 @@ def calibrate_controller_order(num_controllers=8):
     Prompts the user to press a button on each controller to assign letters A-H.
     Stores letters → UID in JSON and updates runtime map.
     """
+    import pygame
+    from joystick_sampler import controller_index
     reset()  # Clear all pairings first
 
     connected_count = pygame.joystick.get_count()
@@ -173,11 +200,12 @@ def calibrate_controller_order(num_controllers=8):
     # Build list of connected joysticks and their UIDs
     joysticks = []
     unique_ids = []
+    controller_index.refresh()
     for i in range(min(num_controllers, connected_count)):
         js = pygame.joystick.Joystick(i)
         js.init()
         joysticks.append(js)
-        uid = get_unique_controller_id(i)
+        uid = controller_index.uid(i)
         unique_ids.append(uid)
         print(f"[{i}] {js.get_name()} | UID={uid.split('_')[-1]}")  # short serial
 
@@ -185,19 +213,23 @@ def calibrate_controller_order(num_controllers=8):
     valid_buttons = {0, 1, 2, 3}  # A B X Y
     assigned = []
 
-    while len(assigned) < len(joysticks):
-        for event in pygame.event.get():
-            if event.type == pygame.JOYBUTTONDOWN:
-                js_index = event.joy
-                btn = event.button
-                uid = unique_ids[js_index]
-
-                if uid not in assigned and btn in valid_buttons:
-                    assigned.append(uid)
-                    letter = string.ascii_uppercase[len(assigned) - 1]
-                    print(f"Controller {js_index + 1} set as {letter} ({uid.split('_')[-1]})")
-
-        pygame.time.wait(10)
+    joystick_sampler.pause()  # this loop reads the SDL event queue itself
+    try:
+        while len(assigned) < len(joysticks):
+            for event in pygame.event.get():
+                if event.type == pygame.JOYBUTTONDOWN:
+                    js_index = event.joy
+                    btn = event.button
+                    uid = unique_ids[js_index]
+
+                    if uid not in assigned and btn in valid_buttons:
+                        assigned.append(uid)
+                        letter = string.ascii_uppercase[len(assigned) - 1]
+                        print(f"Controller {js_index + 1} set as {letter} ({uid.split('_')[-1]})")
+
+            pygame.time.wait(10)
+    finally:
+        joystick_sampler.resume()
 
     # Save mapping letters → UID
     letters = list(string.ascii_uppercase[:len(assigned)])
@@ -208,7 +240,7 @@ def calibrate_controller_order(num_controllers=8):
     print("\nController map saved to controller_map.json:")
     print(json.dumps(controller_map, indent=4))
 
-    # Update runtime CONTROLLER_MAP (letters → joystick index)
+    # Update runtime controller map (letters → joystick index)
     update_runtime_controller_map()
 
 
@@ -230,9 +262,11 @@ def load_controller_map(filename=controller_map_json_path, num_controllers=8):
     Load controller map from JSON file or map defaults.
     Stores letters → UID in JSON; at runtime we use letters → index.
     """
-    global CONTROLLER_MAP, REVERSE_MAP
+    global REVERSE_MAP
+    import pygame
+    from joystick_sampler import map_controllers
 
-    CONTROLLER_MAP = {}
+    controller_map = {}
     REVERSE_MAP = {}
 
     if os.path.exists(filename):
@@ -242,12 +276,9 @@ def load_controller_map(filename=controller_map_json_path, num_controllers=8):
             # Ensure keys are letters
             if isinstance(data, dict) and all(k in string.ascii_uppercase for k in data.keys()):
                 # For each connected joystick, find which letter it maps to
-                for i in range(pygame.joystick.get_count()):
-                    uid = get_unique_controller_id(i)
-                    for letter, stored_uid in data.items():
-                        if uid == stored_uid:
-                            CONTROLLER_MAP[letter] = i
-                REVERSE_MAP = {v: k for k, v in CONTROLLER_MAP.items()}
+                controller_map = map_controllers(data)
+                REVERSE_MAP = {v: k for k, v in controller_map.items()}
+                publish_controller_map(controller_map)
                 print(f"Loaded controller map from {filename}:")
                 print(json.dumps(data, indent=4))
                 return
@@ -260,181 +291,142 @@ def load_controller_map(filename=controller_map_json_path, num_controllers=8):
     # fallback: assign first N joysticks
     letters = list(string.ascii_uppercase[:num_controllers])
     for i in range(min(num_controllers, pygame.joystick.get_count())):
-        CONTROLLER_MAP[letters[i]] = i
-    REVERSE_MAP = {v: k for k, v in CONTROLLER_MAP.items()}
-    print("Using default runtime map:", CONTROLLER_MAP)
+        controller_map[letters[i]] = i
+    REVERSE_MAP = {v: k for k, v in controller_map.items()}
+    publish_controller_map(controller_map)
+    print("Using default runtime map:", controller_map)
 
 
     
-class RobotControllerThread(threading.Thread):
-    def __init__(self, player_id, joystick, ip, port, inverts, bot_info, bot_id):
-        super().__init__()
-        self.player_id = player_id
-        self.joystick = joystick
-        self.ip = ip
-        self.port = port
-        self.inverts = inverts
-        self.bot_info = bot_info
-        self.bot_id = bot_id
-        self.running = True
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.sock.settimeout(0.01)  # short timeout for recvfrom
-        self.daemon = True
-
-    def run(self):
-        global killswitch_value
-        pressed = False  # For killswitch toggle logic (optional)
-        while self.running:
-            pygame.event.pump()
-
-            raw_ch1 = self.joystick.get_axis(AXIS_X)
-            raw_ch2 = self.joystick.get_axis(AXIS_Y)
-            raw_ch3 = max(self.joystick.get_axis(AXIS_LEFT_TRIGGER), self.joystick.get_axis(AXIS_RIGHT_TRIGGER) )
-            hat_x, hat_y = self.joystick.get_hat(0)
-            #raw_ch4 = self.joystick.get_axis(AXIS_LEFT_TRIGGER)
-
-            #account for "mode" being pressed
-            if hat_y != 0:
-                raw_ch2 = hat_y * -1
-
-            if(self.inverts[3]): #swap steer and for/back channels
-                ch2 = scale_axis_drive(raw_ch1, self.inverts[0], self.bot_info[0])
-                ch1 = scale_axis_drive(raw_ch2, self.inverts[1], self.bot_info[1])
-            else: #normal operation
-                ch1 = scale_axis_drive(raw_ch1, self.inverts[0], self.bot_info[0])
-                ch2 = scale_axis_drive(raw_ch2, self.inverts[1], self.bot_info[1])
-            
-            ch3 = scale_axis_spinner(raw_ch3, self.inverts[2], self.bot_info[2], self.bot_info[3])
-
-            ch1, ch2 = check_dead_zone(ch1, ch2)
-
-            with lock:
-                ks = killswitch_value
-
-
-            packet = struct.pack('HHHHH', ch1, ch2, ch3, ks, self.inverts[3])
-            try:
-                self.sock.sendto(packet, (self.ip, self.port))
-                data, _ = self.sock.recvfrom(1024)
-                ack = struct.unpack('?', data[:1])[0]
-                # print(f"[{self.player_id}] Received ack: {ack}")
-            except socket.timeout:
-                #print(f"[{self.player_id}] No response (timeout)")
-                #print("")
-                pass
-
-            time.sleep(SEND_INTERVAL)
-
-    def stop(self):
-        self.running = False
-        self.sock.close()
-
 def pair(player_letter, robot_id):
-    if player_letter not in CONTROLLER_MAP:
-        print(f"Controller {player_letter} is not connected!")
-        return
+    return arena.pair(player_letter, robot_id)
 
-    joystick_index = CONTROLLER_MAP[player_letter]  # runtime index
+def set_killswitch(ks_value):
+    """Change the killswitch and push it to every paired robot right away (don't wait for their next tick)."""
+    arena.set_killswitch(ks_value)
 
-    # Prevent duplicate robot pairing
-    for thread in pairings.values():
-        if thread.bot_id == robot_id:
-            print(f"Robot {robot_id} is already paired to another controller.")
-            return
-
-    robot_info = get_robot_info(robot_id)
-    if not robot_info:
-        print(f"Robot ID '{robot_id}' not found in database.")
-        return
-
-    joystick = pygame.joystick.Joystick(joystick_index)
-    joystick.init()
-    ip, port, inverts, bot_info = robot_info
-    thread = RobotControllerThread(player_letter, joystick, ip, port, inverts, bot_info, robot_id)
-    pairings[player_letter] = thread
-    thread.start()
-    print(f"Paired controller {player_letter} to robot {robot_id} ({ip}:{port})")
-
-def killswitch(ks_value):
-    global killswitch_value
-    with lock:
-        killswitch_value = 2
-    print("Game started (killswitch=2)")
+def get_killswitch():
+    return arena.get_killswitch()
 
 
 def break_pair(player_id):
-    thread = pairings.pop(player_id, None)
-    if thread:
-        thread.stop()
-        print(f"Unpaired {player_id}")
-    else:
-        print(f"{player_id} not paired.")
+    arena.break_pair(player_id)
 
 def start_game():
     #sound_effects.chase_seq()
-    light_clock_handler.start_match(killswitch)
-    #sound_effects.countdown_3sec()
-    #time.sleep(3)
-    
+    arena.start_game()
+    play_countdown()
+
+def play_countdown():
+    # "go" lands as the robots arm; arm_at is only current if the clock just accepted the start
+    if sound_effects is None:
+        print("Sound effects still loading; no countdown")
+    elif arena.clock.current_state == "starting" and arena.clock.arm_at > time.monotonic():
+        sound_effects.countdown_3sec(go_at=arena.clock.arm_at)
 
 def stop_game():
-    light_clock_handler.ko_match()
-    global killswitch_value
-    with lock:
-        killswitch_value = 0
-    print("Game stopped (killswitch=0)")
+    arena.stop_game()
 
 def pause_game():
-    light_clock_handler.pause_match()
-    global killswitch_value
-    with lock:
-        killswitch_value = 0
-    print("game paused (killswitch=0)")
+    arena.pause_game()
 
 def resume_game():
-    light_clock_handler.resume_match()
-    global killswitch_value
-    print("Game will resume after 3 2 1 countdown")
-    time.sleep(3)
-    with lock:
-        killswitch_value = 2
-    print("Game resumed (killswitch=2)")
+    arena.resume_game()
     
 
 def reset():
-    global pairings
-    for player_id in list(pairings.keys()):
-        break_pair(player_id)
-    pairings = {}
-    print("All pairings cleared.")
-
-def show_pairings():
-    if not pairings:
+    arena.reset()
+
+def get_pairing_stats():
+    """Return live link stats (RTT percentiles, ack loss, send jitter) for every active pairing."""
+    return arena.get_pairing_stats()
+
+def show_pairings(target=None):
+    """Print link stats for the pairings of `target` (this process's arena, or an ArenaClient)."""
+    target = target or arena
+    stats = target.get_pairing_stats()
+    if not stats:
         print("No active pairings.")
         return
-    for player, thread in pairings.items():
-        print(f"{player} -> {thread.ip}:{thread.port}")
+
+    def ms(value):
+        return "-" if value is None else f"{value:.1f}"
+
+    for player, s in sorted(stats.items()):
+        print(f"{player} -> {s['ip']}:{s['port']} | "
+              f"rtt p50/p95/p99: {ms(s['rtt_p50_ms'])}/{ms(s['rtt_p95_ms'])}/{ms(s['rtt_p99_ms'])} ms | "
+              f"loss: {s['loss_rate'] * 100:.1f}% | jitter: {s['send_jitter_ms']:.2f} ms | "
+              f"sent: {s['sent']} acked: {s['acked']} | "
+              f"rate: {s['achieved_hz']:.0f}/{s['target_hz']:.0f} Hz, overruns: {s['overruns']}, missed: {s['missed_deadlines']} | "
+              f"airtime saved: {s['airtime_saved'] * 100:.0f}%")
+
+    status = target.status()
+    last = status and status["last_killswitch"]
+    if last:
+        safe = "-" if last["time_to_all_ms"] is None else f"{last['time_to_all_ms']:.1f} ms"
+        print(f"Last killswitch change ({last['killswitch']}): time to all robots confirmed: {safe}"
+              + (f", unconfirmed: {', '.join(sorted(last['unconfirmed']))}" if last["unconfirmed"] else ""))
+
+
+def start_remote_arenas():
+    """Connect to every arena after the first; arenas whose node is this machine are started here."""
+    from arena_node import ArenaClient, LOCAL_HOSTS, spawn_local_node
+    for config in arena_configs[1:]:
+        if config.node is None:
+            print(f"Arena {config.name} has no node address in arenas.json; skipping it.")
+            continue
+        if config.node[0] in LOCAL_HOSTS:
+            node_processes.append(spawn_local_node(config))
+        remote_arenas[config.name] = ArenaClient(*config.node, name=config.name)
+
+def show_arenas():
+    for target in [arena, *remote_arenas.values()]:
+        status = target.status()
+        if status is None:
+            print(f"{target.name}: unreachable")
+            continue
+        pairings = ", ".join(f"{p}->{r}" for p, r in sorted(status["pairings"].items())) or "none"
+        print(f"{target.name}: {status['match_state']} | killswitch {status['killswitch']} | "
+              f"{status['remaining_ms'] // 1000} s left | controllers {''.join(status['controllers'])} | pairings {pairings}")
 
 
 def cleanup_and_exit():
     print("Cleaning up before exit...")
     try:
-        reset()
-        pygame.quit()
-        light_clock_handler.stop()
+        if arena is not None:
+            arena.stop()
+        stop_writer()  # last flush of match history
+        for client in remote_arenas.values():
+            client.close()
+        for process in node_processes:
+            process.terminate()
+        if joystick_sampler is not None:
+            joystick_sampler.stop()
+        if "pygame" in sys.modules:
+            sys.modules["pygame"].quit()
     except Exception as e:
         print(f"Error during cleanup: {e}")
     finally:
         try:
-            # Safely destroy the Tkinter window if it exists
-            if tk._default_root is not None:
-                tk._default_root.destroy()
+            # Safely destroy the Tkinter window if it exists (tkinter is only loaded in GUI mode)
+            tkinter = sys.modules.get("tkinter")
+            if tkinter is not None and tkinter._default_root is not None:
+                tkinter._default_root.destroy()
         except Exception:
             pass
         # Forcefully terminate the process
         os._exit(0)
 
 
+def set_menu_options(menu, var, options, selected=0):
+    """Replace an OptionMenu's entries in place and select options[selected]."""
+    entries = menu["menu"]
+    entries.delete(0, "end")
+    for option in options:
+        entries.add_command(label=option, command=tk._setit(var, option))
+    var.set(options[min(selected, len(options) - 1)] if options else "")
+
+
 class ArenaGUI:
     def __init__(self, root, start_fn, stop_fn, pause_fn, resume_fn, pair_fn, break_fn, reset_fn, controller_cal_fn):
         self.start_fn = start_fn
@@ -448,6 +440,8 @@ class ArenaGUI:
 
         self.root = root
         self.root.title("Robot Arena Control")
+        from db_async import TkDatabaseWorker
+        self.db = TkDatabaseWorker(root)  # database calls never run on the Tk thread
         # Get screen dimensions
         screen_width = root.winfo_screenwidth()
         screen_height = root.winfo_screenheight()
@@ -499,6 +493,13 @@ class ArenaGUI:
         # Expand grid to 3 columns for bottom row
         self.root.grid_columnconfigure(2, weight=1)
 
+        game_state.subscribe(self.on_state_change)
+
+    def on_state_change(self, old, new):
+        # called from whichever thread changed the state; hand over to the Tk thread
+        if old.match_state != new.match_state and new.match_state == "waiting":
+            self.root.after(0, self.show_calibrate_button)  # match over (timer, KO or winner)
+
     def on_stop(self, event=None):
         self.show_calibrate_button()
         self.stop_fn()
@@ -528,6 +529,8 @@ class ArenaGUI:
         messagebox.showinfo("Reset All", "All pairings cleared.")
     
     def break_pair_popup(self, event=None):
+        import db_handler
+        pairings = game_state.snapshot().pairings
         if not pairings:
             messagebox.showinfo("No Active Pairings", "No active pairings!")
             return
@@ -537,26 +540,24 @@ class ArenaGUI:
 
         tk.Label(popup, text="Select Pairing to Break:").grid(row=0, column=0, padx=10, pady=10)
 
+        controllers = sorted(pairings)  # sort by letter
+        pair_var = tk.StringVar(popup)
+        pair_menu = tk.OptionMenu(popup, pair_var, "")
+        pair_menu.grid(row=0, column=1, padx=10, pady=10)
         pairing_display = []
-        controllers = []
-
-        # Fetch robots from DB once
-        robots = db_handler.get_robot_list()
-        robot_lookup = {r['robot_id']: f"{r['robot_type']} - {r['color']}" for r in robots}
 
-        # Build dropdown entries sorted alphabetically by controller letter
-        sorted_pairings = sorted(pairings.items(), key=lambda x: x[0])  # sort by letter
-        for player_letter, thread in sorted_pairings:
-            controller_label = player_letter
-            robot_label = robot_lookup.get(thread.bot_id, f"Robot {thread.bot_id}")
-            pairing_display.append(f"Controller {controller_label} → {robot_label}")
-            controllers.append(player_letter)
+        def show_robots(robots):
+            # robot names come from the roster; until it's loaded the entries just say "Robot <id>"
+            if not popup.winfo_exists():
+                return
+            robot_lookup = {str(r['robot_id']): f"{r['robot_type']} - {r['color']}" for r in robots or []}
+            selected = pairing_display.index(pair_var.get()) if pair_var.get() in pairing_display else 0
+            pairing_display[:] = [f"Controller {letter} → {robot_lookup.get(str(pairings[letter].bot_id), f'Robot {pairings[letter].bot_id}')}"
+                                  for letter in controllers]
+            set_menu_options(pair_menu, pair_var, pairing_display, selected)
 
-        # Default selection
-        pair_var = tk.StringVar(popup)
-        pair_var.set(pairing_display[0])
-        pair_menu = tk.OptionMenu(popup, pair_var, *pairing_display)
-        pair_menu.grid(row=0, column=1, padx=10, pady=10)
+        show_robots(db_handler.get_robot_list(cached_only=True))
+        self.db.call(db_handler.get_robot_list, on_done=show_robots)
 
         def on_break():
             idx = pairing_display.index(pair_var.get())
@@ -590,32 +591,25 @@ class ArenaGUI:
         self.stop_btn.grid()
 
     def pair_robot_popup(self, event=None):
+        import db_handler
         # Gather already connected robots and controllers
+        state = game_state.snapshot()
+        pairings = state.pairings
         already_connected_bots = [thread.bot_id for thread in pairings.values()]
         already_connected_controllers = list(pairings.keys())  # player_id is the letter
 
         available_controllers = sorted([
-            letter for letter in CONTROLLER_MAP
+            letter for letter in state.controller_map
             if letter not in already_connected_controllers
         ])
 
-        # Fetch robots from DB
-        robots = db_handler.get_robot_list(already_connected=already_connected_bots)
-        if not robots:
-            messagebox.showinfo("No Robots", "No available robots to pair.")
-            return
         if len(available_controllers) <= 0:
             messagebox.showinfo("No Controllers", "No available controllers to pair. Break connections first")
             return
 
-        # Robot display
-        robot_display = [f"{r['robot_type']} - {r['color']}" for r in robots]
-
         popup = tk.Toplevel()
         popup.title("Pair Robot")
 
-        
-
         tk.Label(popup, text="Select Controller:").grid(row=0, column=0, padx=10, pady=10)
         controller_var = tk.StringVar(popup)
         controller_var.set(available_controllers[0])
@@ -624,21 +618,45 @@ class ArenaGUI:
 
         tk.Label(popup, text="Select Robot:").grid(row=1, column=0, padx=10, pady=10)
         robot_var = tk.StringVar(popup)
-        robot_var.set(robot_display[0])
-        robot_menu = tk.OptionMenu(popup, robot_var, *robot_display)
+        robot_menu = tk.OptionMenu(popup, robot_var, "")
         robot_menu.grid(row=1, column=1, padx=10, pady=10)
+        robots = []
+        robot_display = []
+
+        def show_robots(available, loaded=True):
+            # first from the cached roster, then again once the database query is back
+            if not popup.winfo_exists():
+                return
+            if not available and loaded:
+                popup.destroy()
+                messagebox.showinfo("No Robots", "No available robots to pair.")
+                return
+            selected = robot_display.index(robot_var.get()) if robot_var.get() in robot_display else 0
+            robots[:] = available or []
+            robot_display[:] = [f"{r['robot_type']} - {r['color']}" for r in robots] or ["Loading robots..."]
+            set_menu_options(robot_menu, robot_var, robot_display, selected)
+
+        show_robots(db_handler.get_robot_list(already_connected=already_connected_bots, cached_only=True), loaded=False)
+        self.db.call(db_handler.get_robot_list, already_connected_bots, on_done=show_robots)
 
         def on_pair():
+            if not robots:
+                return  # still loading
             controller = controller_var.get()
             selected_index = robot_display.index(robot_var.get())
             selected_robot_id = robots[selected_index]['robot_id']
 
-            for thread in pairings.values():
+            for thread in game_state.snapshot().pairings.values():
                 if thread.bot_id == selected_robot_id:
                     messagebox.showerror("Error", "That robot is already paired!")
                     return
 
-            pair(controller, selected_robot_id)
+            def on_paired(ok):
+                if not ok:
+                    messagebox.showerror("Error", f"Could not pair controller {controller} to that robot.")
+
+            # the robot lookup can hit the database, so pair on a worker
+            self.db.call(pair, controller, selected_robot_id, on_done=on_paired)
             popup.destroy()
 
         tk.Button(popup, text="Pair", command=on_pair,
@@ -651,82 +669,121 @@ if __name__ == "__main__":
     signal.signal(signal.SIGINT, lambda sig, frame: cleanup_and_exit())
     parser = argparse.ArgumentParser(description="ROBOT CITY Game Manager")
     parser.add_argument("-gui", action="store_true", help="Run in GUI-only mode (no terminal)")
+    parser.add_argument("-engine", action="store_true", help="Drive all pairings from one scheduler loop instead of one thread per pairing")
+    parser.add_argument("-terminal", action="store_true", help="Run in terminal-only mode (no GUI window)")
     args = parser.parse_args()
 
-    load_controller_map()
-    update_runtime_controller_map() #run once on startup
+    # independent subsystems come up in parallel; pairing only needs the arena, the controllers and the control loop
+    startup = StartupTimer(_import_start)
+    startup.record("imports", _import_start, _import_end)
+    startup.background("robot roster / db sync", warm_database)
+    if not args.terminal:
+        start_arena(startup, args.engine)  # the GUI shows the arena's state from the start
+
+    def needs_arena(cmd):
+        return cmd.startswith(("pair", "break", "winner", "arena")) or \
+            cmd in ("start", "stop", "reset", "pause", "resume", "show pairings", "controller cal")
 
     def launch_terminal_loop():
+        target = arena  # arena the gameplay commands go to; switch with "arena <name>"
         try:
             while True:
                 cmd = input("Command: ").strip().lower()
+                if arena is None and needs_arena(cmd):
+                    # terminal mode: the arena, controllers and sound come up on the first command that needs them
+                    print("Starting the arena...")
+                    start_arena(startup, args.engine)
+                    startup.report()
+                if target is None:
+                    target = arena
                 if cmd.startswith("pair"):
                     parts = cmd.split()
                     if len(parts) == 3:
                         _, player_id, robot_id = parts
-                        pair(player_id, robot_id)
+                        target.pair(player_id, robot_id)
                     else:
                         print("Usage: pair playerX robot_id")
                 elif cmd.startswith("break"):
                     parts = cmd.split()
                     if len(parts) == 2:
                         _, player_id = parts
-                        break_pair(player_id)
+                        target.break_pair(player_id)
                     else:
                         print("Usage: break playerX")
                 elif cmd == "start":
-                    start_game()
+                    target.start_game()
                 elif cmd == "stop":
-                    stop_game()
+                    target.stop_game()
                 elif cmd == "reset":
-                    reset()
+                    target.reset()
+                elif cmd.startswith("winner"):
+                    parts = cmd.split()
+                    if len(parts) == 2:
+                        target.declare_winner(parts[1].upper())
+                    else:
+                        print("Usage: winner <team color>")
                 elif cmd == "show pairings":
-                    show_pairings()
-                elif cmd == "add robot":
-                    db_handler.add_robot()
-                elif cmd == "remove robot":
-                    db_handler.remove_robot()
-                elif cmd == "edit robot":
-                    db_handler.edit_robot()
-                elif cmd == "show robots":
-                    db_handler.show_robots()
-                elif cmd == "show types":
-                    db_handler.show_types()
-                elif cmd == "edit type":
-                    db_handler.edit_type()
+                    show_pairings(target)
+                elif cmd == "arenas":
+                    show_arenas()
+                elif cmd.startswith("arena "):
+                    name = cmd.split(maxsplit=1)[1]
+                    arenas = {a.name.lower(): a for a in [arena, *remote_arenas.values()]}
+                    if name in arenas:
+                        target = arenas[name]
+                        print(f"Commands now go to arena {target.name}")
+                    else:
+                        print(f"No arena named {name}. Arenas: {', '.join(arenas)}")
+                elif cmd in DB_COMMANDS:
+                    run_db_command(cmd)
+                elif cmd == "sound latency":
+                    show_sound_latency()
                 elif cmd == "pause":
-                    pause_game()
+                    target.pause_game()
                 elif cmd == "resume":
-                    resume_game()
+                    target.resume_game()
                 elif cmd == "controller cal":
                     calibrate_controller_order()
                 elif cmd == "exit":
-                    reset()
+                    if arena is not None:
+                        reset()
                     cleanup_and_exit()
                 elif cmd == "help":
                     print("Commands:")
-                    print("\tGameplay: | pair playerX robot_id | break playerX | start | stop | reset | show pairings | exit |")
+                    print("\tGameplay: | pair playerX robot_id | break playerX | start | stop | winner <color> | reset | show pairings | exit |")
+                    print("\tArenas: | arenas | arena <name> |")
                     print("\tIndividual Robot Settings: | show robots | add robot | edit robot | remove robot |")
                     print("\tRobot Type Settings: | show types | edit type |")
+                    print("\tDatabase: | sync db |")
+                    print("\tSound: | sound latency |")
                     print("\tCalibration: | Controller Cal |")
                 else:
                     print("Unknown command.")
         except KeyboardInterrupt:
             cleanup_and_exit()
 
+    if args.terminal:
+        startup.report()
+        launch_terminal_loop()
+        cleanup_and_exit()
+
     # --- Tkinter GUI setup ---
-    root = tk.Tk()
-    gui = ArenaGUI(
-        root,
-        start_fn=start_game,
-        stop_fn=stop_game,
-        pause_fn=pause_game,
-        resume_fn=resume_game,
-        pair_fn=pair,
-        break_fn=break_pair,
-        reset_fn=reset,
-        controller_cal_fn=calibrate_controller_order
-    )
+    with startup.step("gui"):
+        import tkinter as tk  # module-level names for ArenaGUI and set_menu_options
+        from tkinter import messagebox
+        root = tk.Tk()
+        gui = ArenaGUI(
+            root,
+            start_fn=start_game,
+            stop_fn=stop_game,
+            pause_fn=pause_game,
+            resume_fn=resume_game,
+            pair_fn=pair,
+            break_fn=break_pair,
+            reset_fn=reset,
+            controller_cal_fn=calibrate_controller_order
+        )
+    startup.report()
 
     if args.gui:
         # GUI-only: suppress terminal output
@@ -738,4 +795,3 @@ if __name__ == "__main__":
 
     # Tkinter must always run in main thread
     root.mainloop()
-
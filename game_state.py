@@ -0,0 +1,95 @@
+# game_state.py — single versioned store for the arena's live game state
+import threading
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+
+class GameSnapshot(NamedTuple):
+    version: int
+    killswitch: int  # 0 = robots disabled, 1 = drive only, 2 = armed
+    match_state: str  # LightClockHandler state: waiting / starting / counting / paused
+    pairings: Mapping  # player letter -> RobotPairing / RobotControllerThread
+    controller_map: Mapping  # player letter -> pygame joystick index
+
+
+_MAPPING_FIELDS = ("pairings", "controller_map")
+
+
+class GameState:
+    """
+    Holds the game state as immutable, versioned snapshots.
+
+    Readers call snapshot() and get a consistent view without taking any lock;
+    the current snapshot is swapped in with a single reference assignment.
+    Writers are serialized by a lock and build a new snapshot with the version
+    bumped; subscribers are then notified with (old, new) outside the lock, so
+    they may read or update the state themselves.
+    """
+
+    def __init__(self):
+        self._snapshot = GameSnapshot(
+            version=0,
+            killswitch=0,
+            match_state="waiting",
+            pairings=MappingProxyType({}),
+            controller_map=MappingProxyType({}),
+        )
+        self._write_lock = threading.Lock()
+        self._subscribers = []
+
+    def snapshot(self):
+        return self._snapshot
+
+    def subscribe(self, callback):
+        """Call callback(old, new) after every change. Runs on the writer's thread."""
+        self._subscribers.append(callback)
+
+    def update(self, **changes):
+        with self._write_lock:
+            old, new = self._swap(changes)
+        self._notify(old, new)
+        return new
+
+    # --------------------------
+    # Pairings (read-modify-write under the writer lock)
+    # --------------------------
+    def add_pairing(self, player_id, pairing):
+        """Add a pairing unless the controller or robot is already paired. Returns True if added."""
+        with self._write_lock:
+            current = self._snapshot.pairings
+            if player_id in current or any(p.bot_id == pairing.bot_id for p in current.values()):
+                return False
+            pairings = dict(current)
+            pairings[player_id] = pairing
+            old, new = self._swap({"pairings": pairings})
+        self._notify(old, new)
+        return True
+
+    def pop_pairing(self, player_id):
+        """Remove and return a pairing, or None if that controller isn't paired."""
+        with self._write_lock:
+            current = self._snapshot.pairings
+            if player_id not in current:
+                return None
+            pairings = dict(current)
+            pairing = pairings.pop(player_id)
+            old, new = self._swap({"pairings": pairings})
+        self._notify(old, new)
+        return pairing
+
+    def _swap(self, changes):
+        # caller holds _write_lock
+        old = self._snapshot
+        for field in _MAPPING_FIELDS:
+            if field in changes:
+                changes[field] = MappingProxyType(dict(changes[field]))
+        new = old._replace(version=old.version + 1, **changes)
+        self._snapshot = new
+        return old, new
+
+    def _notify(self, old, new):
+        for callback in list(self._subscribers):
+            try:
+                callback(old, new)
+            except Exception as e:
+                print("[GameState] subscriber error:", e)
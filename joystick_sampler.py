@@ -0,0 +1,432 @@
+# joystick_sampler.py — one input-sampling stage for every mapped controller
+import glob
+import os
+import platform
+import string
+import struct
+import threading
+import time
+from array import array
+
+import pygame
+
+from control_engine import FixedRateTicker
+
+# Fields stored per controller slot in a snapshot
+FIELD_X = 0
+FIELD_Y = 1
+FIELD_LEFT_TRIGGER = 2
+FIELD_RIGHT_TRIGGER = 3
+FIELD_HAT_Y = 4
+FIELDS = 5
+
+# Platform dependent axis mapping for right stick and triggers
+if platform.system() == "Linux":
+    AXIS_X = 3 #3
+    AXIS_Y = 1 #1
+    AXIS_LEFT_TRIGGER = 2 #2
+    AXIS_RIGHT_TRIGGER = 5 #5
+    
+else:
+    AXIS_X = 2
+    AXIS_Y = 3
+    AXIS_LEFT_TRIGGER = 4
+    AXIS_RIGHT_TRIGGER = 5
+
+DEFAULT_AXES = (AXIS_X, AXIS_Y, AXIS_LEFT_TRIGGER, AXIS_RIGHT_TRIGGER)
+
+# Controller input is read from device state, not events. Left queued, these would pile up until
+# SDL's queue is full and it starts dropping new events, hot-plug ones included.
+INPUT_EVENTS = (pygame.JOYAXISMOTION, pygame.JOYBALLMOTION, pygame.JOYHATMOTION,
+                pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP)
+HOTPLUG_EVENTS = (pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED)
+
+
+BY_ID_DIR = "/dev/input/by-id"
+SYSFS_INPUT_DIR = "/sys/class/input"
+
+
+def _joystick_serials():
+    """/dev/input/jsN number → device serial, from one scan of the /dev/input/by-id symlinks."""
+    serials = {}
+    for path in glob.glob(os.path.join(BY_ID_DIR, "*-joystick")):
+        try:
+            dev_num = int(os.path.realpath(path).replace("/dev/input/js", ""))
+        except ValueError:
+            continue  # the matching -event-joystick link points at /dev/input/eventN
+        serials.setdefault(dev_num, os.path.basename(path).replace("usb-", "").replace("-joystick", ""))
+    return serials
+
+
+def _read_sysfs(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _joystick_devices():
+    """
+    /dev/input/jsN number → {"name", "vendor", "product", "serial"} for every
+    kernel joystick device. "serial" is the best identity the device has: its
+    by-id serial, else its unique id (a Bluetooth pad's MAC), else the physical
+    port it's plugged into; None if it has none of these (and off Linux).
+    """
+    serials = _joystick_serials()
+    devices = {}
+    for path in glob.glob(os.path.join(SYSFS_INPUT_DIR, "js*")):
+        try:
+            dev_num = int(os.path.basename(path)[2:])
+        except ValueError:
+            continue
+        device = os.path.join(path, "device")
+        vendor = _read_sysfs(os.path.join(device, "id", "vendor"))
+        product = _read_sysfs(os.path.join(device, "id", "product"))
+        devices[dev_num] = {
+            "name": _read_sysfs(os.path.join(device, "name")),
+            "vendor": int(vendor, 16) if vendor else None,
+            "product": int(product, 16) if product else None,
+            "serial": (serials.get(dev_num) or _read_sysfs(os.path.join(device, "uniq"))
+                       or _read_sysfs(os.path.join(device, "phys")) or None),
+        }
+    return devices
+
+
+def _usb_ids(js):
+    """(vendor, product) from a joystick's SDL GUID, or (None, None) if it doesn't carry them."""
+    try:
+        guid = bytes.fromhex(js.get_guid())
+    except (AttributeError, ValueError):
+        return None, None
+    if len(guid) != 16:
+        return None, None
+    vendor, product = struct.unpack_from("<H2xH", guid, 4)  # bus, crc, vendor, 0, product, ...
+    return (vendor, product) if vendor else (None, None)
+
+
+def _find_device(js, devices, claimed):
+    """
+    The jsN number of the kernel device behind pygame joystick `js`: the first
+    device not `claimed` by another connected joystick with the same USB ids
+    (or, failing that, the same name). The pygame index can't be used for this:
+    it stops matching jsN as soon as a controller drops out.
+    """
+    vendor, product = _usb_ids(js)
+    free = [(dev_num, device) for dev_num, device in sorted(devices.items()) if dev_num not in claimed]
+    if vendor is not None:
+        for dev_num, device in free:
+            if (device["vendor"], device["product"]) == (vendor, product):
+                return dev_num
+    name = js.get_name()
+    return next((dev_num for dev_num, device in free if device["name"] == name), None)
+
+
+def _controller_uid(js, device, js_index):
+    name = js.get_name()
+    if device is not None and device["serial"]:
+        return f"{name}_{device['serial']}"
+    return f"{name}_{js_index}"  # fallback: nothing identifies this controller across reconnects
+
+
+def get_unique_controller_id(js_index):
+    """Return a persistent unique ID for the controller at pygame index js_index."""
+    return controller_index.refresh().uid(js_index)
+
+
+class ControllerIndex:
+    """
+    pygame index ↔ controller UID ↔ letter for the connected controllers.
+
+    refresh() walks the joysticks once. Controllers already seen are
+    recognised by their SDL instance id (stable while a device stays
+    connected), so only newly connected ones are identified, with a single
+    scan of /dev/input/by-id and sysfs between them. Each new controller is
+    matched to a kernel device that no connected controller already holds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_instance = {}  # SDL instance id -> UID
+        self._device_of = {}  # SDL instance id -> /dev/input/jsN number (None if not found)
+        self.uids = []  # pygame index -> UID, as of the last refresh
+        self.indices = {}  # UID -> pygame index
+        self.letter_to_uid = {}
+
+    def refresh(self):
+        with self._lock:
+            joysticks = []
+            for i in range(pygame.joystick.get_count()):
+                js = pygame.joystick.Joystick(i)
+                js.init()
+                joysticks.append((i, js, js.get_instance_id()))
+
+            # devices held by controllers that are still connected can't be a newcomer's
+            device_of = {iid: self._device_of[iid] for _, _, iid in joysticks if iid in self._by_instance}
+            claimed = set(device_of.values())
+            devices = None
+            by_instance = {}
+            for i, js, instance_id in joysticks:
+                uid = self._by_instance.get(instance_id)
+                if uid is None:
+                    if devices is None:
+                        devices = _joystick_devices()
+                    dev_num = _find_device(js, devices, claimed)
+                    claimed.add(dev_num)
+                    device_of[instance_id] = dev_num
+                    uid = _controller_uid(js, devices.get(dev_num), i)
+                by_instance[instance_id] = uid
+            self._by_instance = by_instance
+            self._device_of = device_of
+            self.uids = list(by_instance.values())
+            self.indices = {uid: i for i, uid in enumerate(self.uids)}
+        return self
+
+    def uid(self, js_index):
+        """UID of the controller at pygame index js_index."""
+        if js_index >= len(self.uids):
+            self.refresh()
+        return self.uids[js_index]
+
+    def set_letters(self, letter_to_uid):
+        self.letter_to_uid = dict(letter_to_uid)
+
+    def letter(self, js_index):
+        """Letter assigned to the controller at js_index, or None."""
+        return self.letter_for_uid(self.uid(js_index))
+
+    def letter_for_uid(self, uid):
+        return next((letter for letter, u in self.letter_to_uid.items() if u == uid), None)
+
+    def controller_map(self, letters=None):
+        """letters → pygame index for the lettered controllers that are connected (optionally only `letters`)."""
+        return {letter: self.indices[uid] for letter, uid in self.letter_to_uid.items()
+                if uid in self.indices and (letters is None or letter in letters)}
+
+
+controller_index = ControllerIndex()  # shared by everything in this process that maps controllers
+
+
+def map_controllers(letter_to_uid, letters=None):
+    """Return letters → pygame index for the connected controllers whose UID is in letter_to_uid (optionally only `letters`)."""
+    controller_index.refresh()
+    controller_index.set_letters(letter_to_uid)
+    return controller_index.controller_map(letters)
+
+
+class JoystickSampler:
+    """
+    Pumps SDL once and reads every controller in CONTROLLER_MAP into a flat,
+    preallocated snapshot, so pairings never touch pygame themselves.
+
+    Each controller letter gets a fixed slot (A=0, B=1, ...). Samples are written
+    into a back buffer which is then swapped in whole. The buffer a reader holds
+    is refilled two ticks later, so read() retries if a tick finished while it
+    was copying a slot; snapshot() is only stable on the sampling thread.
+
+    Slots follow the controller's UID, not its pygame index: when a pad drops
+    out its slot is held at neutral, and when it re-enumerates (at whatever
+    index) it is bound back to its letter's slot on the next tick.
+    """
+
+    def __init__(self, axes, max_controllers=8):
+        self.axis_x, self.axis_y, self.axis_left_trigger, self.axis_right_trigger = axes
+
+        self._front = array('d', [0.0]) * (max_controllers * FIELDS)
+        self._back = array('d', [0.0]) * (max_controllers * FIELDS)
+        self.joysticks = [None] * max_controllers  # slot -> pygame Joystick (None when not connected)
+        self.timestamp = 0.0  # time.monotonic() of the current snapshot
+        self.samples = 0
+
+        self._lock = threading.Lock()  # guards the joystick list against concurrent sample()/set_controllers()
+        self._tick_lock = threading.RLock()  # held for a whole sample(), so pause() can wait out the one in flight
+        self._paused = threading.Event()
+        self._input_events_blocked = False
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.ticker = None  # FixedRateTicker while sampling on its own thread
+
+        self.letters = None  # letters this sampler may bind on hot-plug (None = any lettered controller)
+        self.controller_map = {}  # letter -> pygame index of the bound controllers
+        self.on_controllers_changed = None  # called with the new controller_map after a hot-plug, on the sampling thread
+        self._slot_of_instance = {}  # SDL instance id -> slot
+
+    @staticmethod
+    def slot_for(letter):
+        return string.ascii_uppercase.index(letter)
+
+    def set_controllers(self, controller_map, letters=None):
+        """Bind slots to pygame joysticks from a letter → pygame index map (hot-plug may bind any of `letters`)."""
+        needed = max((self.slot_for(letter) + 1 for letter in controller_map), default=0)
+
+        with self._lock:
+            if needed > len(self.joysticks):
+                extra = needed - len(self.joysticks)
+                self._front = self._front + array('d', [0.0]) * (extra * FIELDS)
+                self._back = self._back + array('d', [0.0]) * (extra * FIELDS)
+                self.joysticks.extend([None] * extra)
+
+            self.letters = letters
+            self.controller_map = dict(controller_map)
+            self.joysticks = [None] * len(self.joysticks)
+            self._slot_of_instance = {}
+            for letter, js_index in controller_map.items():
+                self._bind(letter, js_index)
+
+            # start every slot from sticks centred and triggers released
+            for slot in range(len(self.joysticks)):
+                for buf in (self._front, self._back):
+                    self._write_neutral(buf, slot)
+
+    def _bind(self, letter, js_index):
+        # caller holds _lock
+        js = pygame.joystick.Joystick(js_index)
+        js.init()
+        slot = self.slot_for(letter)
+        self.joysticks[slot] = js
+        self._slot_of_instance[js.get_instance_id()] = slot
+
+    def _release(self, slot):
+        # caller holds _lock; the robot sees sticks centred and triggers released until the pad is back
+        self.joysticks[slot] = None
+        self._write_neutral(self._front, slot)
+        self._write_neutral(self._back, slot)
+
+    def _handle_hotplug(self, events):
+        controller_index.refresh()
+        changed = False
+        with self._lock:
+            for event in events:
+                if event.type == pygame.JOYDEVICEREMOVED:
+                    slot = self._slot_of_instance.pop(event.instance_id, None)
+                    if slot is not None:
+                        self._release(slot)
+                        changed = True
+                        print(f"Controller {string.ascii_uppercase[slot]} disconnected; holding its robot at neutral")
+                    continue
+
+                uid = controller_index.uid(event.device_index)
+                letter = controller_index.letter_for_uid(uid)
+                if letter is None or (self.letters is not None and letter not in self.letters):
+                    continue
+                slot = self.slot_for(letter)
+                if slot >= len(self.joysticks):
+                    continue  # set_controllers() never made room for it
+                if self.joysticks[slot] is not None:
+                    continue  # already bound (SDL also announces the pads present at startup)
+                self._bind(letter, event.device_index)
+                changed = True
+                print(f"Controller {letter} reconnected")
+
+            if changed:
+                # indices shift when a device goes away; re-read them for every bound controller
+                self.controller_map = {letter: i for letter, i in controller_index.controller_map(self.letters).items()
+                                       if self.joysticks[self.slot_for(letter)] is not None}
+        if changed and self.on_controllers_changed:
+            self.on_controllers_changed(dict(self.controller_map))
+
+    @staticmethod
+    def _write_neutral(buf, slot):
+        base = slot * FIELDS
+        buf[base + FIELD_X] = 0.0
+        buf[base + FIELD_Y] = 0.0
+        buf[base + FIELD_LEFT_TRIGGER] = -1.0
+        buf[base + FIELD_RIGHT_TRIGGER] = -1.0
+        buf[base + FIELD_HAT_Y] = 0.0
+
+    def sample(self):
+        """Take one snapshot of every bound controller. Call once per control tick."""
+        with self._tick_lock:
+            if self._paused.is_set():
+                return
+            self._sample()
+
+    def _sample(self):
+        # caller holds _tick_lock
+        if not self._input_events_blocked:
+            pygame.event.set_blocked(INPUT_EVENTS)
+            self._input_events_blocked = True
+
+        # pumps SDL and empties its queue (nobody else reads it while we sample); only device events matter
+        events = [event for event in pygame.event.get() if event.type in HOTPLUG_EVENTS]
+        if events:
+            self._handle_hotplug(events)
+
+        with self._lock:
+            back = self._back
+            for slot, js in enumerate(self.joysticks):
+                if js is None:
+                    continue
+                base = slot * FIELDS
+                try:
+                    back[base + FIELD_X] = js.get_axis(self.axis_x)
+                    back[base + FIELD_Y] = js.get_axis(self.axis_y)
+                    back[base + FIELD_LEFT_TRIGGER] = js.get_axis(self.axis_left_trigger)
+                    back[base + FIELD_RIGHT_TRIGGER] = js.get_axis(self.axis_right_trigger)
+                    back[base + FIELD_HAT_Y] = js.get_hat(0)[1]
+                except pygame.error:
+                    self._write_neutral(back, slot)  # unplugged since the events were read; handled next tick
+
+            self._back, self._front = self._front, back
+            self.timestamp = time.monotonic()
+            self.samples += 1
+
+    def snapshot(self):
+        """
+        Return the latest complete snapshot: a flat array of FIELDS doubles per slot.
+        The array is reused, so only the thread calling sample() should hold on to it.
+        """
+        return self._front
+
+    def read(self, slot):
+        """Return (x, y, left_trigger, right_trigger, hat_y) for a slot from the latest snapshot."""
+        base = slot * FIELDS
+        while True:
+            samples = self.samples
+            front = self._front
+            values = (front[base + FIELD_X], front[base + FIELD_Y], front[base + FIELD_LEFT_TRIGGER],
+                      front[base + FIELD_RIGHT_TRIGGER], front[base + FIELD_HAT_Y])
+            # a finished tick means this buffer may already be being refilled
+            if self.samples == samples:
+                return values
+
+    # --------------------------
+    # Pausing (e.g. while calibration reads the SDL event queue itself)
+    # --------------------------
+    def pause(self):
+        """
+        Stop sampling; returns once a sample() already in progress has finished
+        with SDL. Input events are let through again until the next sample().
+        """
+        self._paused.set()
+        with self._tick_lock:
+            if self._input_events_blocked:
+                pygame.event.set_allowed(INPUT_EVENTS)
+                self._input_events_blocked = False
+
+    def resume(self):
+        self._paused.clear()
+
+    # --------------------------
+    # Background sampling for the one-thread-per-pairing mode
+    # --------------------------
+    def start(self, interval):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self.ticker = FixedRateTicker(interval)
+
+        def _run():
+            self.ticker.start()
+            while not self._stop_event.is_set():
+                self.sample()
+                self.ticker.wait()
+
+        self._thread = threading.Thread(target=_run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread and threading.current_thread() != self._thread:
+            self._thread.join(timeout=1)
+        self._thread = None
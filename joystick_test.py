@@ -2,9 +2,9 @@ import pygame
 import sys
 import math
 import socket
-import struct
 import time
 import platform
+from robot_protocol import SOCCER_CONTROL, HEAD_BUTTON
 
 # --- UDP Setup ---
 BODY_IP = "192.168.1.80"
@@ -50,7 +50,7 @@ prev_button_state = [False] * 4  # track previous XYAB states
 # --- Helper functions ---
 def send_only(values):
     """Send 4-channel packet to the body."""
-    packet = struct.pack('HHHH', *values)
+    packet = SOCCER_CONTROL.pack(*values)
     sock.sendto(packet, (BODY_IP, BODY_PORT))
     # Print for debugging
     #print(f"Body packet sent -> CH1: {values[0]}, CH2: {values[1]}, CH3: {values[2]}, KS: {values[3]}")
@@ -61,7 +61,7 @@ def send_head(button_id):
         button_id = 1
     elif button_id == 1:
         button_id = 2
-    packet = struct.pack('!I', button_id)  # network byte order
+    packet = HEAD_BUTTON.pack(button_id)  # network byte order
     sock.sendto(packet, (HEAD_IP, HEAD_PORT))
     print(f"Head packet sent -> Button ID: {button_id}")
 
@@ -0,0 +1,145 @@
+# killswitch_broadcast.py — out-of-band killswitch burst with per-robot confirmation
+import selectors
+import socket
+import threading
+import time
+
+from robot_protocol import ControlPacket, parse_ack
+
+RETRANSMIT_INTERVAL = 0.005  # seconds between retries to robots that haven't acked
+CONFIRM_TIMEOUT = 0.25  # give up on unconfirmed robots after this long
+
+
+class KillswitchBroadcaster:
+    """
+    Pushes a killswitch change to every paired robot the moment it happens,
+    instead of waiting for each control loop's next tick.
+
+    The first packet to every robot is sent from the caller's thread. A
+    background thread then resends to each robot that hasn't acked yet, every
+    RETRANSMIT_INTERVAL, until all have confirmed or CONFIRM_TIMEOUT passes.
+    The burst uses its own socket so the acks don't mix with control-loop acks,
+    and takes sequence numbers from each robot's control counter after the new
+    value is published. A control packet numbered before that is dropped as
+    stale by v1 firmware; one numbered after it but built from the old value
+    is caught by RobotPairing.send_channels, which re-reads the killswitch once
+    the packet has its number.
+
+    Burst packets are written to `recorder` (a MatchRecorder), like control packets.
+    """
+
+    def __init__(self, retransmit_interval=RETRANSMIT_INTERVAL, confirm_timeout=CONFIRM_TIMEOUT, recorder=None):
+        self.retransmit_interval = retransmit_interval
+        self.confirm_timeout = confirm_timeout
+        self.recorder = recorder
+        self.last_result = None  # summary of the most recent burst
+        self._generation = 0  # a newer burst cancels any older one still retrying
+        self._lock = threading.Lock()
+
+    def broadcast(self, pairings, ks):
+        """Send killswitch `ks` to every pairing now and confirm it in the background."""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+
+        start = time.monotonic()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+
+        targets = {}  # address -> burst state for one robot
+        for pairing in pairings:
+            target = {
+                "pairing": pairing,
+                "packet": ControlPacket(pairing.packet.version, pairing.packet.sequence),
+                "seqs": {},  # seq -> (send time, recorder index)
+                "confirmed_at": None,
+                "attempts": 0,
+            }
+            targets[pairing.address] = target
+            self._send(sock, target, ks)
+
+        if not targets:
+            sock.close()
+            return
+
+        threading.Thread(target=self._confirm, args=(sock, targets, ks, start, generation), daemon=True).start()
+
+    def _send(self, sock, target, ks):
+        pairing = target["pairing"]
+        if ks == 0:
+            ch1, ch2, ch3 = 1500, 1500, 1500  # robot falls back to its own defaults when disabled
+        else:
+            ch1, ch2, ch3 = pairing.last_channels
+        data = target["packet"].pack(ch1, ch2, ch3, ks, pairing.inverts[3])
+        try:
+            sock.sendto(data, pairing.address)
+        except OSError:
+            pass
+        now = time.monotonic()
+        seq = target["packet"].seq
+        record = None
+        if self.recorder is not None:
+            record = self.recorder.record(now, pairing.robot_number, pairing.slot, ks, ch1, ch2, ch3, seq)
+        target["seqs"][seq] = (now, record)
+        target["attempts"] += 1
+
+    def _confirm(self, sock, targets, ks, start, generation):
+        selector = selectors.DefaultSelector()
+        selector.register(sock, selectors.EVENT_READ)
+        deadline = start + self.confirm_timeout
+        next_retry = start + self.retransmit_interval
+        remaining = len(targets)
+
+        try:
+            while remaining and generation == self._generation:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                if now >= next_retry:
+                    for target in targets.values():
+                        if target["confirmed_at"] is None:
+                            self._send(sock, target, ks)
+                    next_retry = now + self.retransmit_interval
+
+                if not selector.select(min(next_retry, deadline) - now):
+                    continue
+                while True:
+                    try:
+                        data, address = sock.recvfrom(1024)
+                    except OSError:
+                        break
+                    target = targets.get(address)
+                    if target is None or target["confirmed_at"] is not None:
+                        continue
+                    received, seq = parse_ack(data)
+                    if received and (seq is None or seq in target["seqs"]):
+                        target["confirmed_at"] = time.monotonic()
+                        if seq is not None:
+                            target["packet"].sequence.confirm()
+                        remaining -= 1
+                        if seq is not None and self.recorder is not None:
+                            sent_at, record = target["seqs"][seq]
+                            self.recorder.mark_ack(record, target["confirmed_at"] - sent_at)
+        finally:
+            selector.close()
+            sock.close()
+
+        if generation != self._generation:
+            return  # superseded by a newer killswitch change
+
+        confirmed = {t["pairing"].player_id: (t["confirmed_at"] - start) * 1000
+                     for t in targets.values() if t["confirmed_at"] is not None}
+        unconfirmed = [t["pairing"].player_id for t in targets.values() if t["confirmed_at"] is None]
+        self.last_result = {
+            "killswitch": ks,
+            "confirmed_ms": confirmed,
+            "unconfirmed": unconfirmed,
+            "time_to_all_ms": max(confirmed.values()) if not unconfirmed else None,
+            "attempts": sum(t["attempts"] for t in targets.values()),
+        }
+
+        if unconfirmed:
+            print(f"Killswitch {ks}: NOT confirmed by {', '.join(sorted(unconfirmed))} "
+                  f"({len(confirmed)}/{len(targets)} confirmed)")
+        else:
+            print(f"Killswitch {ks}: all {len(targets)} robots confirmed in {self.last_result['time_to_all_ms']:.1f} ms")
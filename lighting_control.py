@@ -4,51 +4,143 @@ import time
 from ola.ClientWrapper import ClientWrapper
 import math
 
+from control_engine import FixedRateTicker
+
 UNIVERSE = 1
+DMX_CHANNELS = 512
+FRAME_RATE = 44  # DMX frames per second; a full 512-channel universe tops out around 44
+KEEPALIVE_INTERVAL = 1.0  # seconds; an unchanged frame is re-sent this often
+BLANK = bytes(DMX_CHANNELS)
+
+
+def _dmx_sent(status):
+    pass
+
 
 class LightingController:
-    def __init__(self):
+    """
+    Effects write into self.data (a preallocated bytearray) and call
+    send_dmx(), which only copies the frame for the render thread and returns.
+    The render thread sends at FRAME_RATE from its own buffer, skipping frames
+    identical to the last one sent (bar a keepalive every KEEPALIVE_INTERVAL).
+    Frames replaced before the render thread got to them count as dropped.
+    """
+
+    def __init__(self, universe=UNIVERSE, frame_rate=FRAME_RATE, keepalive_interval=KEEPALIVE_INTERVAL):
+        self.universe = universe  # OLA universe of this arena's fixtures
         self.wrapper = ClientWrapper()
         self.client = self.wrapper.Client()
-        self.data = [0] * 512
+        self.data = bytearray(DMX_CHANNELS)  # frame being built by the effects
 
         # Event to control wait loop / sequence stop
         self.waiting = threading.Event()
         self.wait_thread = None
 
-        # Lock + throttle to serialize DMX sends
-        self._send_lock = threading.Lock()
-        self._last_send_time = 0.0
-        self.min_send_interval = 0.02  # seconds (50 Hz); raise to 0.03-0.05 if needed
+        # Double buffer: send_dmx() fills _pending, the render thread swaps it with _front and sends that
+        self._pending = bytearray(DMX_CHANNELS)
+        self._front = bytearray(DMX_CHANNELS)
+        self._last_sent = bytearray(DMX_CHANNELS)
+        self._scratch = bytearray(DMX_CHANNELS)  # for frames passed to send_dmx(data=...)
+        self._frame_cond = threading.Condition()
+        self._dirty = False
+        self._published = 0  # frames handed to send_dmx()
+        self._rendered = 0  # value of _published as of the last frame the render thread sent (or skipped as unchanged)
+
+        self.keepalive_interval = keepalive_interval
+        self.frames_sent = 0
+        self.frames_unchanged = 0  # render ticks with nothing new to send
+        self.frames_dropped = 0  # frames replaced by a newer one before they were sent
+        self.send_errors = 0
+
+        self.ticker = FixedRateTicker(1.0 / frame_rate)
+        self._render_started = None
+        self._stop_event = threading.Event()
+        self._render_thread = threading.Thread(target=self._render_loop, daemon=True)
+        self._render_thread.start()
 
         # push a clean frame immediately
         self.send_dmx(replicate=False)
 
-    # ---------- DMX send with serialization + throttle ----------
+    # ---------- Frame hand-off to the render thread ----------
     def send_dmx(self, data=None, replicate=True):
-        if data is None:
-            data = self.data
+        """Queue a frame (self.data unless `data` is given) for the next DMX tick. Never blocks on the send."""
+        frame = self.data
+        if data is not None:
+            # copied into a full universe, padded or cut to DMX_CHANNELS, so the buffers never change size
+            if not replicate:
+                frame = self._scratch  # replicate=True keeps the frame in self.data, as it always has
+            n = min(len(data), DMX_CHANNELS)
+            frame[:n] = data[:n]
+            frame[n:] = BLANK[n:]
 
         if replicate:
-            ch1 = data[:8]
-            new_data = ch1 * 4
-            new_data.extend([0] * (512 - len(new_data)))
-            data = new_data
-            self.data = new_data
-
-        def dmx_sent(status):
-            pass
-
-        with self._send_lock:
-            now = time.time()
-            since = now - self._last_send_time
-            if since < self.min_send_interval:
-                time.sleep(self.min_send_interval - since)
-            try:
-                self.client.SendDmx(UNIVERSE, bytearray(data), dmx_sent)
-            except Exception as e:
-                print("[LightingController] SendDmx exception:", e)
-            self._last_send_time = time.time()
+            # the first fixture's 8 channels drive all four
+            frame[8:32] = frame[:8] * 3
+            frame[32:] = BLANK[32:]
+
+        with self._frame_cond:
+            if self._dirty:
+                self.frames_dropped += 1
+            self._pending[:] = frame
+            self._dirty = True
+            self._published += 1
+
+    def _clear(self):
+        self.data[:] = BLANK
+
+    def _render_loop(self):
+        self._render_started = time.monotonic()
+        self.ticker.start()
+        last_send_time = None
+        while not self._stop_event.is_set():
+            with self._frame_cond:
+                taken = self._published
+                if self._dirty:
+                    self._pending, self._front = self._front, self._pending
+                    self._dirty = False
+
+            now = time.monotonic()
+            if self._front != self._last_sent or last_send_time is None or now - last_send_time >= self.keepalive_interval:
+                try:
+                    self.client.SendDmx(self.universe, self._front, _dmx_sent)
+                except Exception as e:
+                    self.send_errors += 1
+                    print("[LightingController] SendDmx exception:", e)
+                self._last_sent[:] = self._front
+                self.frames_sent += 1
+                last_send_time = now
+            else:
+                self.frames_unchanged += 1
+
+            with self._frame_cond:
+                self._rendered = taken
+                self._frame_cond.notify_all()
+            self.ticker.wait()
+
+    def flush(self, timeout=0.2):
+        """Wait (up to `timeout` s) until the last frame queued has been sent."""
+        with self._frame_cond:
+            target = self._published
+            self._frame_cond.wait_for(lambda: self._rendered >= target, timeout)
+
+    def stats(self):
+        """Render thread counters: achieved frame rate, frames sent / unchanged / dropped, late ticks."""
+        elapsed = time.monotonic() - self._render_started if self._render_started else 0.0
+        return {
+            "frame_rate": self.ticker.ticks / elapsed if elapsed else 0.0,
+            "sent": self.frames_sent,
+            "unchanged": self.frames_unchanged,
+            "dropped": self.frames_dropped,
+            "late": self.ticker.overruns + self.ticker.missed,
+            "send_errors": self.send_errors,
+        }
+
+    def close(self):
+        """Send whatever is queued and stop the render thread."""
+        self.flush()
+        self._stop_event.set()
+        if threading.current_thread() != self._render_thread:
+            self._render_thread.join(timeout=1)
 
     # ---------- Safe stop / join ----------
     def stop_wait(self):
@@ -134,7 +226,7 @@ class LightingController:
         end_time = start_time + max(0, duration - 0.05)
 
         # small initial frame
-        self.data = [0] * 512
+        self._clear()
         self.send_dmx(replicate=False)
         time.sleep(0.05)
 
@@ -151,7 +243,7 @@ class LightingController:
             elif remaining < 0.5:
                 scale = remaining / 0.5
 
-            self.data = [0] * 512
+            self._clear()
             for light in range(4):
                 phase = (2 * math.pi * t / period) + (light * math.pi / 2)
                 sine_val = (math.sin(phase) + 1) / 2
@@ -169,13 +261,13 @@ class LightingController:
             time.sleep(delay)
 
         # clear when done
-        self.data = [0] * 512
+        self._clear()
         self.send_dmx(replicate=False)
 
     def chase_sequence(self, r=255, g=255, b=255, white=255, amber=0, delay=0.02, period=0.45, duration=5.0):
         #"""Run a sine-wave chase effect for a duration."""
         self.stop_wait()
-        self.data = [0] * 512
+        self._clear()
         self.send_dmx(replicate=False)
         time.sleep(0.05)
 
@@ -193,7 +285,7 @@ class LightingController:
                 elif remaining < 0.5:
                     scale = remaining / 0.5
 
-                self.data = [0] * 512
+                self._clear()
                 for light in range(4):
                     phase = (2 * math.pi * t / period) + (light * math.pi / 2)
                     sine_val = (math.sin(phase) + 1) / 2
@@ -212,7 +304,7 @@ class LightingController:
                 time.sleep(delay)
 
             # Turn off lights
-            self.data = [0] * 512
+            self._clear()
             self.send_dmx(replicate=False)
 
         self.wait_thread = threading.Thread(target=_chase, daemon=True)
@@ -233,7 +325,7 @@ class LightingController:
 
     def pause(self):
         self.stop_wait()
-        self.data = [0] * 512
+        self._clear()
         self.data[2] = 255  # Blue
         self.data[5] = 255 # UV
         self.data[6] = 255
@@ -242,8 +334,9 @@ class LightingController:
 
     def off(self):
         self.stop_wait()
-        self.data = [0] * 512
+        self._clear()
         self.send_dmx()
+        self.flush()  # used at shutdown: make sure the blackout goes out
 
     # ---------- Fade out (non-blocking) ----------
     def _fade_out_blocking(self, duration=1.0, kill=True):
@@ -263,7 +356,7 @@ class LightingController:
             wait += delay
 
         # reset channels 6 & 7
-        self.data = [0] * 512
+        self._clear()
         for i in range(4):
             self.data[i * 8 + 6] = 255
             self.data[i * 8 + 7] = 255
@@ -284,7 +377,7 @@ class LightingController:
             elapsed += delay
 
         # Reset lights
-        self.data = [0] * 512
+        self._clear()
         for i in range(4):
             self.data[i*8 + 6] = 255
             self.data[i*8 + 7] = 255
@@ -332,7 +425,7 @@ class LightingController:
             time.sleep(4)  # Allow chase to run
 
         def _countdown():
-            self.data = [0] * 512
+            self._clear()
             self.data[6] = 255
             self.data[7] = 255
             for _ in range(3):
@@ -0,0 +1,229 @@
+# match_history.py — match results and per-robot link quality, written to the database behind the game
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+INSERTS = {
+    "game_match": "INSERT INTO game_match (match_id, arena, started_at, ended_at, duration_ms, end_reason, winner) "
+                  "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+    "match_participant": "INSERT INTO match_participant (match_id, player, robot_id) VALUES (%s, %s, %s)",
+    "link_stats": "INSERT INTO link_stats (match_id, robot_id, sent, acked, lost, loss_rate, rtt_p50_ms, rtt_p95_ms, "
+                  "rtt_p99_ms, send_jitter_ms) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+}
+TABLE_ORDER = ("game_match", "match_participant", "link_stats")  # parents first
+
+FLUSH_INTERVAL = 2.0  # seconds between batches
+RETRY_INTERVAL = 10.0  # seconds to wait after a failed flush
+MAX_BUFFERED_MATCHES = 500  # oldest matches are dropped beyond this while the database is down
+
+
+def _timestamp(t):
+    return datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+class HistoryWriter:
+    """
+    Write-behind queue for match history.
+
+    enqueue() only puts a match's rows on a queue, so the game thread never
+    waits on the database. A background thread batches everything queued
+    into one executemany per table and commits it. If the database is
+    unreachable the rows stay buffered (up to MAX_BUFFERED_MATCHES matches)
+    and the flush is retried every RETRY_INTERVAL seconds.
+    """
+
+    def __init__(self, get_connection, flush_interval=FLUSH_INTERVAL, retry_interval=RETRY_INTERVAL,
+                 max_buffered=MAX_BUFFERED_MATCHES, integrity_errors=()):
+        self.get_connection = get_connection
+        self.integrity_errors = integrity_errors  # raised for duplicate keys by the connection's driver
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.max_buffered = max_buffered
+
+        self._queue = queue.SimpleQueue()
+        self._buffer = []  # matches waiting to be written: {table: [row, ...]}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.written = 0
+        self.dropped = 0
+        self.failures = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def enqueue(self, rows):
+        """Queue one match's rows ({table: [row tuple, ...]}) to be written. Never blocks."""
+        self._queue.put(rows)
+
+    def pending(self):
+        return len(self._buffer) + self._queue.qsize()
+
+    def _drain(self):
+        while True:
+            try:
+                self._buffer.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        overflow = len(self._buffer) - self.max_buffered
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.dropped += overflow
+            print(f"[history] database unavailable; dropped the {overflow} oldest buffered matches")
+
+    def _run(self):
+        wait = self.flush_interval
+        while not self._stop_event.wait(wait):
+            self._drain()
+            wait = self.flush_interval if not self._buffer or self.flush() else self.retry_interval
+        self._drain()
+        if self._buffer:
+            self.flush()
+
+    def flush(self):
+        """Write every buffered match in one transaction. Returns False (keeping the buffer) on failure."""
+        batch = self._buffer[:]
+        if not batch:
+            return True
+        try:
+            self._write(batch)
+            written = batch
+        except self.integrity_errors:
+            # some were already written by a flush whose commit went through; write the rest one at a time
+            written = self._write_individually(batch)
+        except Exception as e:
+            written = []
+            print(f"[history] could not write {len(batch)} matches, keeping them buffered: {e}")
+        done = {id(match) for match in written}
+        self._buffer[:len(batch)] = [match for match in batch if id(match) not in done]
+        self.written += len(written)
+        if len(written) < len(batch):
+            self.failures += 1
+            return False
+        return True
+
+    def _write(self, batch):
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            for table in TABLE_ORDER:
+                rows = [row for match in batch for row in match.get(table, ())]
+                if rows:
+                    cursor.executemany(INSERTS[table], rows)
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def _write_individually(self, batch):
+        """Write matches one per transaction; returns those that are now in the database (or already were)."""
+        done = []
+        for match in batch:
+            try:
+                self._write([match])
+            except self.integrity_errors as e:
+                print(f"[history] skipped match {match['game_match'][0][0]} (rejected as a duplicate or invalid): {e}")
+            except Exception as e:
+                print(f"[history] could not write match {match['game_match'][0][0]}, keeping it buffered: {e}")
+                continue
+            done.append(match)
+        return done
+
+    def stop(self, timeout=5.0):
+        """Stop the writer after a last attempt to flush what's buffered."""
+        self._stop_event.set()
+        if self._thread and threading.current_thread() != self._thread:
+            self._thread.join(timeout)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """The process-wide HistoryWriter, started on first use, writing through db_handler's connections."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            import db_handler
+            _writer = HistoryWriter(db_handler.get_connection, integrity_errors=db_handler.INTEGRITY_ERRORS).start()
+        return _writer
+
+
+def stop_writer(timeout=5.0):
+    """Flush and stop the process-wide writer, if one was started."""
+    if _writer is not None:
+        _writer.stop(timeout)
+
+
+class MatchHistory:
+    """
+    Tracks the match in progress for one arena and hands its rows to a
+    HistoryWriter when it ends. Pairings made during the match are added with
+    track(); link counters are reported as the change over the match.
+    """
+
+    def __init__(self, arena, writer=None):
+        self.arena = arena
+        self.writer = writer
+        self._lock = threading.Lock()
+        self._match = None
+
+    def start(self, pairings):
+        with self._lock:
+            self._match = {
+                "match_id": uuid.uuid4().hex,
+                "started_at": time.time(),
+                "players": set(),
+                "links": {},  # robot_id -> [(pairing, sent, acked, lost) at tracking time]
+            }
+            for player, pairing in pairings.items():
+                self._track(player, pairing)
+
+    def track(self, player, pairing):
+        """Add a pairing made while a match is running."""
+        with self._lock:
+            if self._match is not None:
+                self._track(player, pairing)
+
+    def _track(self, player, pairing):
+        # caller holds _lock
+        acks = pairing.acks
+        self._match["players"].add((player, pairing.bot_id))
+        self._match["links"].setdefault(pairing.bot_id, []).append((pairing, acks.sent, acks.acked, acks.lost))
+
+    @property
+    def in_progress(self):
+        return self._match is not None
+
+    def end(self, reason, winner=None):
+        """Finish the match ("TIMER", "KO", "WINNER" or "ABORTED") and queue its rows. No-op if none is running."""
+        with self._lock:
+            match, self._match = self._match, None
+        if match is None:
+            return None
+
+        ended_at = time.time()
+        match_id = match["match_id"]
+        rows = {
+            "game_match": [(match_id, self.arena, _timestamp(match["started_at"]), _timestamp(ended_at),
+                            int((ended_at - match["started_at"]) * 1000), reason, winner)],
+            "match_participant": [(match_id, player, robot_id) for player, robot_id in sorted(match["players"], key=str)],
+            "link_stats": [],
+        }
+        for robot_id, tracked in match["links"].items():
+            sent = sum(p.acks.sent - s for p, s, _, _ in tracked)
+            acked = sum(p.acks.acked - a for p, _, a, _ in tracked)
+            lost = sum(p.acks.lost - l for p, _, _, l in tracked)
+            stats = tracked[-1][0].acks.stats.summary()  # rolling window of the latest pairing
+            rows["link_stats"].append((match_id, robot_id, sent, acked, lost, min(1.0, lost / sent) if sent else None,
+                                       stats["rtt_p50_ms"], stats["rtt_p95_ms"], stats["rtt_p99_ms"],
+                                       stats["send_jitter_ms"]))
+
+        (self.writer or get_writer()).enqueue(rows)
+        return match_id
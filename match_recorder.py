@@ -0,0 +1,189 @@
+# match_recorder.py — always-on binary log of every control packet sent to the robots
+import glob
+import itertools
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RECORDINGS_DIR = "recordings"
+DEFAULT_CAPACITY = 1 << 20  # records per file (~26 MB); oldest records are overwritten when full
+KEEP_RECORDINGS = int(os.getenv("KEEP_RECORDINGS", "20"))  # per arena; older files are deleted when a new one starts
+
+# record() returns index | generation << GENERATION_SHIFT, so mark_ack() can tell which file the index belongs to
+GENERATION_SHIFT = 48
+INDEX_MASK = (1 << GENERATION_SHIFT) - 1
+
+MAGIC = b"RCREC001"
+# magic, record size, capacity, records written, wall-clock start, monotonic start
+HEADER = struct.Struct('<8sIIQdd')
+HEADER_SIZE = 64
+COUNT_OFFSET = 16  # where "records written" sits inside the header
+COUNT = struct.Struct('<Q')
+
+# time (monotonic), robot id, controller slot, killswitch, ch1, ch2, ch3, seq, acked, rtt (ms, NaN until acked)
+RECORD = struct.Struct('<dHBBHHHHBxf')
+ACK_OFFSET = 20  # where "acked" sits inside a record
+ACK = struct.Struct('<Bxf')
+
+NAN = float("nan")
+
+NUMPY_DTYPE = [
+    ("time", "<f8"), ("robot", "<u2"), ("slot", "u1"), ("ks", "u1"),
+    ("ch1", "<u2"), ("ch2", "<u2"), ("ch3", "<u2"), ("seq", "<u2"),
+    ("ack", "u1"), ("_pad", "u1"), ("rtt_ms", "<f4"),
+]
+
+
+class MatchRecorder:
+    """
+    Appends one fixed-size record per control packet to a preallocated,
+    memory-mapped ring file.
+
+    Writing a record is a struct.pack_into() into the mapping, so the control
+    loop does no allocation and no syscall per packet. Record slots are handed
+    out by an atomic counter, so several control threads can write at once;
+    only the header's record count is updated under a lock, so it never goes
+    backwards when two threads finish out of order.
+    When an ack comes back, the ack flag and RTT are filled into the send's
+    own record; acks for a file that has since been rotated out are ignored.
+
+    Only the newest `keep` recordings in the directory are kept.
+    """
+
+    def __init__(self, directory=RECORDINGS_DIR, capacity=DEFAULT_CAPACITY, keep=KEEP_RECORDINGS):
+        self.directory = directory
+        self.capacity = capacity
+        self.keep = keep
+        self.path = None
+        self._file = None
+        self._ring = None  # (mapping, record counter, generation), replaced as a whole by start()
+        self._generations = itertools.count(1)
+        self._count_lock = threading.Lock()  # serialises the header's read-max-write of the record count
+        self._start_mono = 0.0
+
+    def start(self, label="match"):
+        """Close the current recording (if any) and start a new file."""
+        self.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"{label}_{time.strftime('%Y%m%d_%H%M%S')}.bin")
+
+        size = HEADER_SIZE + self.capacity * RECORD.size
+        self._file = open(self.path, "w+b")
+        self._file.truncate(size)
+        mapping = mmap.mmap(self._file.fileno(), size)
+
+        self._start_mono = time.monotonic()
+        HEADER.pack_into(mapping, 0, MAGIC, RECORD.size, self.capacity, 0, time.time(), self._start_mono)
+        self._ring = (mapping, itertools.count(), next(self._generations))  # next() is atomic
+        print(f"[MatchRecorder] Recording to {self.path}")
+        self._prune()
+
+    def _prune(self):
+        recordings = sorted(glob.glob(os.path.join(self.directory, "*.bin")), key=os.path.getmtime)
+        for path in recordings[:max(0, len(recordings) - self.keep)]:
+            if path != self.path:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"[MatchRecorder] Could not remove old recording {path}: {e}")
+
+    def record(self, now, robot, slot, ks, ch1, ch2, ch3, seq):
+        """Append a send record. Returns a tag for mark_ack, or None if not recording."""
+        ring = self._ring
+        if ring is None:
+            return None
+        mapping, counter, generation = ring
+        index = next(counter)
+        try:
+            RECORD.pack_into(mapping, HEADER_SIZE + (index % self.capacity) * RECORD.size,
+                             now, robot, slot, ks, ch1, ch2, ch3, seq, 0, NAN)
+            with self._count_lock:
+                if COUNT.unpack_from(mapping, COUNT_OFFSET)[0] <= index:
+                    COUNT.pack_into(mapping, COUNT_OFFSET, index + 1)
+        except ValueError:  # file rotated underneath us
+            return None
+        return index | generation << GENERATION_SHIFT
+
+    def mark_ack(self, tag, rtt):
+        """Fill in the ack and RTT (seconds) for the send that record() returned `tag` for."""
+        ring = self._ring
+        if ring is None or tag is None:
+            return
+        mapping, _, generation = ring
+        if tag >> GENERATION_SHIFT != generation:
+            return  # recorded in an earlier file
+        index = tag & INDEX_MASK
+        try:
+            written = COUNT.unpack_from(mapping, COUNT_OFFSET)[0]
+            if written - index > self.capacity:
+                return  # slot has been overwritten since
+            ACK.pack_into(mapping, HEADER_SIZE + (index % self.capacity) * RECORD.size + ACK_OFFSET, 1, rtt * 1000)
+        except ValueError:  # file rotated underneath us
+            pass
+
+    def close(self):
+        ring, self._ring = self._ring, None
+        if ring is not None:
+            mapping = ring[0]
+            mapping.flush()
+            for _ in range(10):
+                try:
+                    mapping.close()
+                    break
+                except BufferError:  # a control thread is mid-write
+                    time.sleep(0.001)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_match(path):
+    """
+    Load a recording into a NumPy structured array in the order the records
+    were written, with an extra `wall_time` column (seconds since the epoch).
+    """
+    import numpy as np
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    magic, record_size, capacity, written, start_wall, start_mono = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a match recording")
+
+    records = np.frombuffer(data, dtype=np.dtype(NUMPY_DTYPE), count=capacity, offset=HEADER_SIZE)
+    if written > capacity:
+        # ring wrapped: oldest record sits right after the newest one
+        start = written % capacity
+        records = np.concatenate((records[start:], records[:start]))
+    else:
+        records = records[:written]
+
+    wall_time = start_wall + (records["time"] - start_mono)
+    names = [name for name, _ in NUMPY_DTYPE if name != "_pad"]
+    out = np.empty(len(records), dtype=[(n, records.dtype[n]) for n in names] + [("wall_time", "<f8")])
+    for name in names:
+        out[name] = records[name]
+    out["wall_time"] = wall_time
+    return out
+
+
+if __name__ == "__main__":
+    # quick per-robot summary: python match_recorder.py recordings/match_....bin
+    import numpy as np
+
+    match = load_match(sys.argv[1])
+    print(f"{len(match)} packets")
+    for robot in np.unique(match["robot"]):
+        rows = match[match["robot"] == robot]
+        acked = rows["ack"] == 1
+        rtts = rows["rtt_ms"][acked]
+        p95 = f"{np.percentile(rtts, 95):.1f} ms" if len(rtts) else "-"
+        print(f"robot {robot}: {len(rows)} sent, {acked.mean() * 100:.1f}% acked, rtt p95 {p95}")
@@ -0,0 +1,219 @@
+# robot_link.py — per-robot link bookkeeping (acks, latency, loss, jitter) for the control loop
+from array import array
+from collections import deque
+
+ACK_TIMEOUT = 0.25  # seconds; a send not acked within this is counted as lost
+STATS_WINDOW = 256  # number of recent sends/acks the rolling stats cover
+
+# Heartbeats when nothing has changed; both well inside the firmware's 500 ms FAILSAFE_DISCONNECT
+IDLE_HEARTBEAT = 0.1  # killswitch off (waiting for a match, countdown, paused)
+LIVE_HEARTBEAT = 0.05  # match running, sticks/trigger unchanged
+
+
+class LinkStats:
+    """
+    Rolling link-quality stats for one robot in fixed memory.
+
+    RTTs and ack outcomes live in preallocated ring buffers covering the last
+    `window` samples; send jitter is a running estimate (RFC 3550 style) of how
+    much each send's lateness against its tick deadline varies. Gaps between
+    sends aren't used, since SendPolicy skips ticks and switches heartbeat rates.
+    """
+
+    def __init__(self, window=STATS_WINDOW):
+        self.window = window
+
+        self._rtts = array('d', [0.0]) * window  # seconds
+        self._rtt_index = 0
+        self._rtt_count = 0
+
+        self._outcomes = array('b', [0]) * window  # 1 = acked, 0 = lost
+        self._outcome_index = 0
+        self._outcome_count = 0
+        self._outcome_lost = 0
+
+        self._last_late = None
+        self.jitter = 0.0  # seconds
+
+    def on_send(self, now, deadline=None):
+        if deadline is None:  # not sent from a ticker; nothing to measure against
+            return
+        late = now - deadline
+        if self._last_late is not None:
+            self.jitter += (abs(late - self._last_late) - self.jitter) / 16
+        self._last_late = late
+
+    def on_ack(self, rtt):
+        self._rtts[self._rtt_index] = rtt
+        self._rtt_index = (self._rtt_index + 1) % self.window
+        self._rtt_count = min(self._rtt_count + 1, self.window)
+        self._add_outcome(1)
+
+    def on_loss(self):
+        self._add_outcome(0)
+
+    def _add_outcome(self, acked):
+        if self._outcome_count == self.window:
+            # overwrite the oldest outcome
+            self._outcome_lost -= 1 - self._outcomes[self._outcome_index]
+        else:
+            self._outcome_count += 1
+        self._outcomes[self._outcome_index] = acked
+        self._outcome_lost += 1 - acked
+        self._outcome_index = (self._outcome_index + 1) % self.window
+
+    def rtt_percentiles(self, percentiles=(50, 95, 99)):
+        """Return RTT percentiles in ms (nearest-rank), or None for each if no acks yet."""
+        if self._rtt_count == 0:
+            return [None for _ in percentiles]
+        samples = sorted(self._rtts[:self._rtt_count])
+        n = len(samples)
+        return [samples[min(n - 1, max(0, -(-p * n // 100) - 1))] * 1000 for p in percentiles]
+
+    def loss_rate(self):
+        if self._outcome_count == 0:
+            return 0.0
+        return self._outcome_lost / self._outcome_count
+
+    def summary(self):
+        p50, p95, p99 = self.rtt_percentiles()
+        return {
+            "rtt_p50_ms": p50,
+            "rtt_p95_ms": p95,
+            "rtt_p99_ms": p99,
+            "loss_rate": self.loss_rate(),
+            "send_jitter_ms": self.jitter * 1000,
+        }
+
+
+class AckTracker:
+    """
+    Matches acks coming back from a robot to the sends they answer.
+
+    Sends are timestamped as they go out. Firmware speaking protocol v1 echoes
+    the packet's sequence number, so its acks are matched exactly and any older
+    outstanding sends are counted as lost. Older firmware answers with a bare
+    1-byte bool, in which case each ack is matched to the oldest send that hasn't
+    expired yet. Sends older than ack_timeout are dropped and counted as lost.
+    """
+
+    def __init__(self, ack_timeout=ACK_TIMEOUT, max_outstanding=64):
+        self.ack_timeout = ack_timeout
+        self.pending = deque(maxlen=max_outstanding)  # (send timestamp, seq, tag) awaiting an ack
+        self.stats = LinkStats()
+
+        self.sent = 0
+        self.acked = 0
+        self.lost = 0
+        self.unmatched = 0  # acks that arrived with nothing outstanding
+        self.last_rtt = None
+        self.last_ack_time = None
+        self.last_acked_tag = None  # tag given to on_send() for the most recently acked packet
+
+    def on_send(self, now, seq=None, tag=None, deadline=None):
+        self._expire(now)
+        if len(self.pending) == self.pending.maxlen:
+            # oldest send is pushed out without an ack
+            self.lost += 1
+            self.stats.on_loss()
+        self.pending.append((now, seq, tag))
+        self.sent += 1
+        self.stats.on_send(now, deadline)
+
+    def on_ack(self, now, seq=None):
+        """Record an ack received at `now`. Returns the round-trip time in seconds, or None."""
+        self._expire(now)
+        self.last_ack_time = now
+        if seq is not None:
+            if not any(pending[1] == seq for pending in self.pending):
+                self.unmatched += 1  # duplicate, or the send already expired
+                return None
+            # everything sent before the acked packet went unanswered
+            while self.pending[0][1] != seq:
+                self.pending.popleft()
+                self.lost += 1
+                self.stats.on_loss()
+        elif not self.pending:
+            self.unmatched += 1
+            return None
+        sent_at, _, self.last_acked_tag = self.pending.popleft()
+        rtt = now - sent_at
+        self.acked += 1
+        self.last_rtt = rtt
+        self.stats.on_ack(rtt)
+        return rtt
+
+    def _expire(self, now):
+        while self.pending and now - self.pending[0][0] > self.ack_timeout:
+            self.pending.popleft()
+            self.lost += 1
+            self.stats.on_loss()
+
+    def summary(self):
+        """Counters plus rolling latency/loss/jitter stats, ready for display or an API."""
+        summary = {
+            "sent": self.sent,
+            "acked": self.acked,
+            "lost": self.lost,
+            "last_rtt_ms": self.last_rtt * 1000 if self.last_rtt is not None else None,
+        }
+        summary.update(self.stats.summary())
+        return summary
+
+
+class SendPolicy:
+    """
+    Decides, tick by tick, whether a robot actually needs a packet.
+
+    While the killswitch is off the robot ignores its channels, so it only gets
+    an IDLE_HEARTBEAT to keep the link alive. While a match is live, a packet
+    goes out whenever the channel values change, plus a LIVE_HEARTBEAT when
+    they don't. A killswitch change is always sent straight away. With
+    adaptive=False every tick is sent (the old behaviour).
+    """
+
+    def __init__(self, adaptive=True, idle_heartbeat=IDLE_HEARTBEAT, live_heartbeat=LIVE_HEARTBEAT):
+        self.adaptive = adaptive
+        self.idle_heartbeat = idle_heartbeat
+        self.live_heartbeat = live_heartbeat
+
+        self._last = None  # (ch1, ch2, ch3, ks) of the last packet sent
+        self._last_send = None
+
+        self.sent = 0
+        self.changes = 0  # sends triggered by new values / killswitch
+        self.heartbeats = 0  # sends triggered only by the heartbeat
+        self.suppressed = 0  # ticks that didn't need a packet
+
+    def should_send(self, now, ch1, ch2, ch3, ks):
+        last = self._last
+        if not self.adaptive or last is None or last[3] != ks:
+            changed = True
+        elif ks == 0:
+            changed = False  # channels are ignored by the robot while the killswitch is off
+        else:
+            changed = last[0] != ch1 or last[1] != ch2 or last[2] != ch3
+
+        if changed:
+            self.changes += 1
+        else:
+            heartbeat = self.live_heartbeat if ks else self.idle_heartbeat
+            if now - self._last_send < heartbeat:
+                self.suppressed += 1
+                return False
+            self.heartbeats += 1
+
+        self._last = (ch1, ch2, ch3, ks)
+        self._last_send = now
+        self.sent += 1
+        return True
+
+    def summary(self):
+        ticks = self.sent + self.suppressed
+        return {
+            "policy_sent": self.sent,
+            "policy_changes": self.changes,
+            "policy_heartbeats": self.heartbeats,
+            "policy_suppressed": self.suppressed,
+            "airtime_saved": self.suppressed / ticks if ticks else 0.0,
+        }
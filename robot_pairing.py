@@ -0,0 +1,132 @@
+# robot_pairing.py — one controller → robot link: channel mixing, packet send and ack collection
+import select
+import socket
+import threading
+import time
+
+from channel_mixer import scale_axis_drive, scale_axis_spinner, check_dead_zone
+from control_engine import FixedRateTicker
+from robot_link import AckTracker, SendPolicy
+from robot_protocol import ControlPacket, parse_ack
+
+
+class RobotPairing:
+    """Per-robot state and packet logic shared by the threaded and engine control paths."""
+    def __init__(self, player_id, sampler, ip, port, inverts, bot_info, bot_id, recorder=None, adaptive=True,
+                 get_killswitch=None):
+        self.player_id = player_id
+        self.sampler = sampler
+        self.slot = sampler.slot_for(player_id)
+        self.ip = ip
+        self.port = port
+        self.address = (ip, port)
+        self.inverts = inverts
+        self.bot_info = bot_info
+        self.bot_id = bot_id
+        self.robot_number = int(bot_id) if str(bot_id).isdigit() else 0  # robot id as stored in match recordings
+        self.running = True
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)  # acks are collected separately, never waited on after a send
+        self.packet = ControlPacket()  # reusable send buffer, also carries the sequence number
+        self.acks = AckTracker()
+        self.policy = SendPolicy(adaptive=adaptive)
+        self.recorder = recorder  # MatchRecorder logging every packet sent, or None
+        self.last_channels = (1500, 1500, 1500)  # most recent ch1-ch3, reused by the killswitch burst
+        self.get_killswitch = get_killswitch  # returns the current killswitch value
+
+    def read_channels(self):
+        raw_ch1, raw_ch2, left_trigger, right_trigger, hat_y = self.sampler.read(self.slot)
+        raw_ch3 = max(left_trigger, right_trigger)
+
+        #account for "mode" being pressed
+        if hat_y != 0:
+            raw_ch2 = hat_y * -1
+
+        if(self.inverts[3]): #swap steer and for/back channels
+            ch2 = scale_axis_drive(raw_ch1, self.inverts[0], self.bot_info[0])
+            ch1 = scale_axis_drive(raw_ch2, self.inverts[1], self.bot_info[1])
+        else: #normal operation
+            ch1 = scale_axis_drive(raw_ch1, self.inverts[0], self.bot_info[0])
+            ch2 = scale_axis_drive(raw_ch2, self.inverts[1], self.bot_info[1])
+        
+        ch3 = scale_axis_spinner(raw_ch3, self.inverts[2], self.bot_info[2], self.bot_info[3])
+
+        ch1, ch2 = check_dead_zone(ch1, ch2)
+        return ch1, ch2, ch3
+
+    def send_control(self, ks, deadline=None):
+        ch1, ch2, ch3 = self.read_channels()
+        self.send_channels(ch1, ch2, ch3, ks, deadline)
+
+    def send_channels(self, ch1, ch2, ch3, ks, deadline=None):
+        # deadline: the ticker deadline this send belongs to, for send jitter
+        self.last_channels = (ch1, ch2, ch3)
+        if not self.policy.should_send(time.monotonic(), ch1, ch2, ch3, ks):
+            return
+        packet = self.packet.pack(ch1, ch2, ch3, ks, self.inverts[3])
+        # The killswitch burst takes its sequence numbers after publishing a change. If `ks` went stale
+        # before this packet got its number, the packet would outrank the burst, so it's not sent.
+        if self.get_killswitch is not None and self.get_killswitch() != ks:
+            return
+        try:
+            self.sock.sendto(packet, self.address)
+        except OSError:
+            return
+        now = time.monotonic()
+        seq = self.packet.seq if self.packet.version >= 1 else None
+        record = None
+        if self.recorder is not None:
+            record = self.recorder.record(now, self.robot_number, self.slot, ks, ch1, ch2, ch3, self.packet.seq)
+        self.acks.on_send(now, seq, record, deadline)
+
+    def receive_acks(self):
+        """Drain every ack waiting on the (non-blocking) socket."""
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(1024)
+            except OSError:  # nothing left to read (or the socket was closed)
+                return
+            ack, seq = parse_ack(data)
+            if ack:
+                if seq is not None:
+                    self.packet.sequence.confirm()  # the robot follows this sequence; stop flagging a reset
+                rtt = self.acks.on_ack(time.monotonic(), seq)
+                if rtt is not None and self.recorder is not None:
+                    self.recorder.mark_ack(self.acks.last_acked_tag, rtt)
+            # print(f"[{self.player_id}] Received ack: {ack}")
+
+    def wait_for_acks(self, deadline):
+        """Collect acks as they arrive until `deadline` (monotonic), then return so the next send stays on time."""
+        while self.running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                readable, _, _ = select.select([self.sock], [], [], remaining)
+            except (OSError, ValueError):  # socket closed by stop()
+                return
+            if readable:
+                self.receive_acks()
+
+    def stop(self):
+        self.running = False
+        self.sock.close()
+
+
+class RobotControllerThread(RobotPairing, threading.Thread):
+    """A pairing that runs its own fixed-rate send loop on a dedicated thread."""
+    def __init__(self, player_id, sampler, ip, port, inverts, bot_info, bot_id, get_killswitch, interval=0.01, **kwargs):
+        RobotPairing.__init__(self, player_id, sampler, ip, port, inverts, bot_info, bot_id,
+                              get_killswitch=get_killswitch, **kwargs)
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.ticker = FixedRateTicker(interval)
+
+    def run(self):
+        pressed = False  # For killswitch toggle logic (optional)
+        self.ticker.start()
+        while self.running:
+            self.send_control(self.get_killswitch(), self.ticker.tick_deadline)
+
+            # acks are picked up while waiting for the next send, so a silent robot can't slow the loop down
+            self.ticker.wait(self.wait_for_acks)
@@ -0,0 +1,105 @@
+# robot_protocol.py — UDP wire formats shared by the arena server, test scripts and firmware
+import itertools
+import os
+import random
+import struct
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Control packet version sent to the robots. Robot_ESP32.ino accepts both; set
+# ROBOT_PROTOCOL_VERSION=0 in .env while robots still run older firmware.
+PROTOCOL_VERSION = int(os.getenv("ROBOT_PROTOCOL_VERSION", "1"))
+
+# v0: ch1, ch2, ch3, killswitch, invert_drive (5 x uint16, 10 bytes)
+CONTROL_V0 = struct.Struct('<HHHHH')
+# v1: version, flags, seq, ch1, ch2, ch3, killswitch, invert_drive (14 bytes)
+CONTROL_V1 = struct.Struct('<BBHHHHHH')
+# v1 flags: bit 0 = sequence reset, bits 1-7 = id of the sender's sequence (0 from senders that predate them)
+FLAG_SEQ_RESET = 0x01
+SEQUENCE_ID_SHIFT = 1
+
+# v0 ack: 1-byte bool. v1 ack: bool, version, echoed seq (4 bytes)
+ACK_V0 = struct.Struct('<?')
+ACK_V1 = struct.Struct('<?BH')
+
+# Soccer robot body: ch1-ch4 (joystick_test.py)
+SOCCER_CONTROL = struct.Struct('<HHHH')
+# Soccer robot head: button id
+HEAD_BUTTON = struct.Struct('!I')
+# Arena clock: command, time in deciseconds
+CLOCK_COMMAND = struct.Struct('!HH')
+
+
+_sequence_ids = itertools.count(random.randrange(127))  # random per process, distinct within it
+
+
+class Sequence:
+    """
+    Sequence numbers for one stream of control packets to a robot.
+
+    Every new stream (a new pairing, or a restarted game_master) counts from 1
+    again, which the robot would take for old packets while it's still
+    connected to the previous stream. So until the robot acks one of this
+    stream's packets, they carry FLAG_SEQ_RESET and the stream's id, and the
+    firmware accepts the first one as the start of a new sequence.
+    """
+
+    def __init__(self):
+        self._counter = itertools.count(1)
+        self.id = next(_sequence_ids) % 127 + 1  # 1-127
+        self.synced = False  # set once the robot has acked a packet of this sequence
+
+    def __next__(self):
+        return next(self._counter)  # next() on the count is atomic
+
+    def flags(self):
+        return (self.id << SEQUENCE_ID_SHIFT) | (0 if self.synced else FLAG_SEQ_RESET)
+
+    def confirm(self):
+        self.synced = True
+
+
+class ControlPacket:
+    """
+    Reusable send buffer for one robot.
+
+    pack() writes into the same preallocated bytearray every time, so the
+    control loop allocates nothing per packet. In v1 every packet carries the
+    next sequence number, which lets the robot drop reordered or stale commands
+    and echo the number back in its ack.
+
+    Buffers that send to the same robot from different threads (e.g. the
+    killswitch burst) share one `sequence` so the numbers stay ordered.
+    """
+
+    def __init__(self, version=None, sequence=None):
+        self.version = PROTOCOL_VERSION if version is None else version
+        self.struct = CONTROL_V1 if self.version >= 1 else CONTROL_V0
+        self.buffer = bytearray(self.struct.size)
+        self.sequence = Sequence() if sequence is None else sequence
+        self.seq = 0  # sequence number of the last packet packed into this buffer
+
+    def next_seq(self):
+        self.seq = next(self.sequence) & 0xFFFF
+        return self.seq
+
+    def pack(self, ch1, ch2, ch3, ks, invert_drive):
+        """Pack a control packet in place and return the buffer (valid until the next pack())."""
+        if self.version >= 1:
+            self.struct.pack_into(self.buffer, 0, self.version, self.sequence.flags(), self.next_seq(),
+                                  ch1, ch2, ch3, ks, invert_drive)
+        else:
+            self.struct.pack_into(self.buffer, 0, ch1, ch2, ch3, ks, invert_drive)
+        return self.buffer
+
+
+def parse_ack(data):
+    """Return (received, seq) from a robot ack; seq is None for v0 acks."""
+    if not data:
+        return False, None
+    if len(data) >= ACK_V1.size:
+        received, _version, seq = ACK_V1.unpack_from(data)
+        return received, seq
+    return ACK_V0.unpack_from(data)[0], None
@@ -0,0 +1,265 @@
+# robot_simulator.py — impersonates a fleet of Robot_ESP32 receivers on localhost for load/failure testing
+#
+#   python robot_simulator.py -n 16 --latency-ms 3 --jitter-ms 2 --loss 0.02 --dead 5,9 --fixture sim_robots.json
+#
+# then point game_master at the fixture (ROBOT_FIXTURE=sim_robots.json in .env) and pair
+# controllers to robots 900, 901, ... exactly like real ones.
+import argparse
+import heapq
+import itertools
+import json
+import random
+import selectors
+import socket
+import time
+
+from robot_protocol import CONTROL_V0, CONTROL_V1, ACK_V0, ACK_V1, FLAG_SEQ_RESET, SEQUENCE_ID_SHIFT
+
+# Mirrors the constants in Robot_ESP32.ino
+FAILSAFE_DISCONNECT = 0.5  # seconds without a valid packet before the robot disables itself
+SAFE_VARIANCE = 25  # channels must be this close to default to leave killswitch 0
+PWM_RANGE = (1000, 2000)
+FIRMWARE_VERSION = 1
+
+FIRST_ROBOT_ID = 900
+BASE_PORT = 5000
+
+# robot_type limits written to the fixture (same columns as the robot_type table)
+SIM_ROBOT_TYPE = {"robot_type": "SIM", "steering_limit": 1.0, "forward_limit": 1.0,
+                  "weapon_limit": 1.0, "bidirectional_weapon": False}
+
+
+class SimulatedRobot:
+    """Receive-side state machine of one ESP32, following UDP_packet() / execute_package()."""
+
+    def __init__(self, robot_id, port, bidirectional_weapon=False, dead=False):
+        self.robot_id = robot_id
+        self.port = port
+        self.dead = dead  # bound but never answers, like a robot that's switched off
+        self.ch3_default = 1500 if bidirectional_weapon else 1000
+
+        self.connected = False
+        self.last_packet = 0.0
+        self.last_seq = 0
+        self.last_sequence_id = 0
+        self.killswitch = 0
+        self.channels = (1500, 1500, self.ch3_default)
+
+        self.received = 0
+        self.acked = 0
+        self.invalid = 0  # wrong length / version
+        self.stale = 0  # v1 packets dropped for an old sequence number
+        self.lost = 0  # dropped by the simulated link
+        self.failsafes = 0
+        self.unsafe_arms = 0  # arm requests refused because sticks weren't centered
+
+    def handle(self, data, now):
+        """Process one packet; return the ack to send back, or None."""
+        self.received += 1
+        version = None
+        if len(data) == CONTROL_V1.size and data[0] == FIRMWARE_VERSION:
+            version, flags, seq, v1, v2, v3, v4, _v5 = CONTROL_V1.unpack(data)
+            sequence_id = flags >> SEQUENCE_ID_SHIFT
+            # drop reordered/stale commands; after a disconnect any sequence number is accepted
+            if self.connected and not (flags & FLAG_SEQ_RESET and sequence_id != self.last_sequence_id):
+                diff = (seq - self.last_seq) & 0xFFFF  # (int16_t)(seq - lastSeq) <= 0 in the firmware
+                if sequence_id != self.last_sequence_id or diff == 0 or diff >= 0x8000:
+                    self.stale += 1
+                    return None
+            self.last_seq = seq
+            self.last_sequence_id = sequence_id
+        elif len(data) == CONTROL_V0.size:
+            v1, v2, v3, v4, _v5 = CONTROL_V0.unpack(data)
+        else:
+            self.invalid += 1
+            return None
+
+        self.last_packet = now
+        self.connected = True
+        self.execute_package(v1, v2, v3, v4)
+        self.acked += 1
+        if version is not None:
+            return ACK_V1.pack(True, version, seq)
+        return ACK_V0.pack(True)
+
+    def execute_package(self, v1, v2, v3, v4):
+        if v4 not in (0, 1, 2):
+            self.killswitch = 0
+            self.channels = (1500, 1500, self.ch3_default)
+            return
+        v1, v2, v3 = (min(max(v, PWM_RANGE[0]), PWM_RANGE[1]) for v in (v1, v2, v3))
+
+        if v4 == 0:
+            self.killswitch = 0
+            self.channels = (1500, 1500, self.ch3_default)
+            return
+
+        if v4 > self.killswitch:
+            # leaving a safer mode requires the sticks (and the weapon, to arm) at rest
+            safe = abs(v1 - 1500) <= SAFE_VARIANCE and abs(v2 - 1500) <= SAFE_VARIANCE
+            if v4 == 2:
+                safe = safe and abs(v3 - self.ch3_default) <= SAFE_VARIANCE
+            if not safe:
+                self.unsafe_arms += 1
+                return
+        self.killswitch = v4
+        self.channels = (v1, v2, v3 if v4 == 2 else self.ch3_default)
+
+    def check_failsafe(self, now):
+        if self.connected and now - self.last_packet >= FAILSAFE_DISCONNECT:
+            self.connected = False
+            self.failsafes += 1
+            self.execute_package(1500, 1500, self.ch3_default, 0)
+            print(f"[robot {self.robot_id}] Connection dropped! Failsafe enabled")
+
+    def summary(self):
+        return {
+            "robot_id": self.robot_id,
+            "port": self.port,
+            "dead": self.dead,
+            "received": self.received,
+            "acked": self.acked,
+            "lost": self.lost,
+            "stale": self.stale,
+            "invalid": self.invalid,
+            "failsafes": self.failsafes,
+            "unsafe_arms": self.unsafe_arms,
+            "killswitch": self.killswitch,
+            "channels": self.channels,
+        }
+
+
+class RobotFleet:
+    """
+    N simulated robots on consecutive localhost ports, served from one selector loop.
+
+    Each ack is delayed by `latency` ± `jitter` (seconds) to model the round
+    trip, and both the command and the ack are dropped with probability `loss`.
+    Robots listed in `dead` (0-based) receive but never answer.
+    """
+
+    def __init__(self, count, base_port=BASE_PORT, host="127.0.0.1", first_id=FIRST_ROBOT_ID,
+                 latency=0.002, jitter=0.001, loss=0.0, dead=(), seed=None):
+        self.host = host
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.random = random.Random(seed)
+
+        self.selector = selectors.DefaultSelector()
+        self.robots = []
+        for i in range(count):
+            robot = SimulatedRobot(first_id + i, base_port + i, dead=i in dead)
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind((host, robot.port))
+            sock.setblocking(False)
+            self.selector.register(sock, selectors.EVENT_READ, robot)
+            self.robots.append(robot)
+
+        self._acks = []  # heap of (due, tiebreak, sock, ack, address)
+        self._tiebreak = itertools.count()
+        self.running = False
+
+    def write_fixture(self, path):
+        """Write the fleet as robot rows (same columns as the robot table) for db_handler to load."""
+        rows = [dict(robot_id=robot.robot_id, local_ip=self.host, network_port=robot.port, color="YELLOW",
+                     CH1_INVERT=False, CH2_INVERT=False, CH3_INVERT=False, INVERT_DRIVE=False, **SIM_ROBOT_TYPE)
+                for robot in self.robots]
+        with open(path, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"Wrote {len(rows)} simulated robots to {path}")
+
+    def run(self, duration=None):
+        self.running = True
+        end = time.monotonic() + duration if duration else None
+        try:
+            while self.running:
+                now = time.monotonic()
+                if end is not None and now >= end:
+                    break
+                self._send_due_acks(now)
+
+                timeout = 0.01  # failsafe resolution
+                if self._acks:
+                    timeout = min(timeout, max(0.0, self._acks[0][0] - now))
+                for key, _ in self.selector.select(timeout):
+                    self._receive(key.fileobj, key.data)
+
+                now = time.monotonic()
+                for robot in self.robots:
+                    robot.check_failsafe(now)
+        finally:
+            self.running = False
+            for key in list(self.selector.get_map().values()):
+                key.fileobj.close()
+            self.selector.close()
+
+    def stop(self):
+        self.running = False
+
+    def _receive(self, sock, robot):
+        # like the firmware's loop(), drain the socket and act on the newest packet only
+        latest = None
+        while True:
+            try:
+                data, address = sock.recvfrom(1024)
+            except OSError:
+                break
+            if self.loss and self.random.random() < self.loss:
+                robot.lost += 1
+                continue
+            latest = (data, address)
+        if latest is None or robot.dead:
+            return
+
+        data, address = latest
+        ack = robot.handle(data, time.monotonic())
+        if ack is None or (self.loss and self.random.random() < self.loss):
+            return
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        heapq.heappush(self._acks, (time.monotonic() + delay, next(self._tiebreak), sock, ack, address))
+
+    def _send_due_acks(self, now):
+        while self._acks and self._acks[0][0] <= now:
+            _, _, sock, ack, address = heapq.heappop(self._acks)
+            try:
+                sock.sendto(ack, address)
+            except OSError:
+                pass
+
+    def print_summary(self):
+        print(f"{'robot':>6} {'port':>6} {'recv':>8} {'acked':>8} {'lost':>6} {'stale':>6} {'fail':>5} {'ks':>3}  channels")
+        for robot in self.robots:
+            s = robot.summary()
+            tag = " (dead)" if s["dead"] else ""
+            print(f"{s['robot_id']:>6} {s['port']:>6} {s['received']:>8} {s['acked']:>8} {s['lost']:>6} "
+                  f"{s['stale']:>6} {s['failsafes']:>5} {s['killswitch']:>3}  {s['channels']}{tag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate a fleet of ESP32 robots on localhost")
+    parser.add_argument("-n", "--robots", type=int, default=8, help="number of simulated robots")
+    parser.add_argument("--base-port", type=int, default=BASE_PORT, help="UDP port of the first robot")
+    parser.add_argument("--first-id", type=int, default=FIRST_ROBOT_ID, help="robot_id of the first robot")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="mean round-trip delay added to acks")
+    parser.add_argument("--jitter-ms", type=float, default=1.0, help="± random variation of that delay")
+    parser.add_argument("--loss", type=float, default=0.0, help="drop probability for each command and each ack")
+    parser.add_argument("--dead", default="", help="comma-separated robot numbers (0-based) that never answer")
+    parser.add_argument("--fixture", help="write a robot fixture file for game_master (ROBOT_FIXTURE)")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--seed", type=int, help="random seed for repeatable loss/jitter")
+    args = parser.parse_args()
+
+    dead = {int(i) for i in args.dead.split(",") if i.strip()}
+    fleet = RobotFleet(args.robots, base_port=args.base_port, first_id=args.first_id,
+                       latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                       loss=args.loss, dead=dead, seed=args.seed)
+    if args.fixture:
+        fleet.write_fixture(args.fixture)
+
+    print(f"Simulating {args.robots} robots on ports {args.base_port}-{args.base_port + args.robots - 1}. Ctrl+C to stop.")
+    try:
+        fleet.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    fleet.print_summary()
@@ -1,13 +1,14 @@
 import socket
-import struct
 from time import sleep
 import time
+from robot_protocol import ControlPacket, parse_ack
 
 ESP32_IP = "192.168.1.4"  # Replace with variable robot IP
 PORT = 4210 # Replace with robot port
 
 sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 sock.settimeout(0.05)
+packet = ControlPacket()
 
 last_response_time = time.time()
 
@@ -16,15 +17,15 @@ def send_and_receive(values):
     #assert all(1000 <= v <= 2000 for v in values), "Values must be 1000"
     
     
-    # Pack 4 unsigned bytes
-    packet = struct.pack('HHHH', *values)
+    # ch1, ch2, ch3, killswitch (+ invert_drive off)
+    data = packet.pack(*values, 0)
     
     # Send
-    sock.sendto(packet, (ESP32_IP, PORT))
+    sock.sendto(data, (ESP32_IP, PORT))
     
     try:
         data, _ = sock.recvfrom(1024)
-        result = struct.unpack('?', data[:1])[0]  # Use only the first byte
+        result, seq = parse_ack(data)
         print("Received bool:", result)
         return result
     except socket.timeout:
@@ -2,59 +2,208 @@ import pygame
 import threading
 import time
 import os
-from pydub import AudioSegment
-from pydub.playback import play
-import tempfile
+import io
+import glob
+import hashlib
+import heapq
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_FOLDER = "sound_cache"
+CACHE_VERSION = b"mono-1"  # bump when the processing in _process() changes
+
+# name -> (file in the sound folder, volume 0.0 → 1.0); any other WAV in the folder loads under its file name
+SOUNDS = {
+    "countdown": ("3sec_countdown.wav", 1.0),
+    "chase_seq": ("chase_seq.wav", 0.2),  # low volume
+    "buzzer": ("buzzer.wav", 0.55),
+}
+
+# Mixer channels kept back for cues, so a cue never waits for (or cuts off) another sound
+CUE_CHANNELS = {"countdown": 0, "buzzer": 1, "chase_seq": 2}
+OTHER_CUE_CHANNEL = 3  # everything else
+RESERVED_CHANNELS = 4
+
+COUNTDOWN_LEAD = 3.0  # seconds from the start of 3sec_countdown.wav to "go"
+BUZZER_DELAY = 5.0  # seconds after the match timer runs out
+CHASE_DELAY = 1.5
+
+
+def _process(path):
+    """Decode a sound file and mix it down to mono; returns WAV bytes."""
+    from pydub import AudioSegment  # only needed on a cache miss, and slow to import
+    audio = AudioSegment.from_file(path)
+    out = io.BytesIO()
+    audio.set_channels(1).export(out, format="wav")  # mix to mono
+    return out.getvalue()
+
+
+class CueScheduler:
+    """
+    Plays sounds at absolute time.monotonic() timestamps on reserved mixer
+    channels, from one scheduler thread. schedule() only queues the cue, so
+    callers never block. The gap between each cue's scheduled and actual
+    start is kept, to check that e.g. the countdown lines up with arming.
+    """
+
+    def __init__(self, reserved=RESERVED_CHANNELS):
+        pygame.mixer.set_reserved(reserved)
+        self.channels = [pygame.mixer.Channel(i) for i in range(reserved)]
+        self.latencies = deque(maxlen=200)  # (name, seconds late)
+
+        self._queue = []  # heap of (at, order, name, sound, channel index)
+        self._order = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def schedule(self, name, sound, at=None):
+        """Play `sound` at monotonic time `at` (now if None) on the channel reserved for `name`."""
+        channel = CUE_CHANNELS.get(name, OTHER_CUE_CHANNEL) % len(self.channels)
+        with self._cond:
+            self._order += 1
+            heapq.heappush(self._queue, (time.monotonic() if at is None else at, self._order, name, sound, channel))
+            self._cond.notify()
+
+    def cancel(self, name=None):
+        """Drop pending cues (only `name`'s, if given)."""
+        with self._cond:
+            self._queue = [cue for cue in self._queue if name is not None and cue[2] != name]
+            heapq.heapify(self._queue)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._queue or self._queue[0][0] > time.monotonic()):
+                    timeout = self._queue[0][0] - time.monotonic() if self._queue else None
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                at, _, name, sound, channel = heapq.heappop(self._queue)
+            self.channels[channel].play(sound)
+            late = time.monotonic() - at
+            with self._cond:
+                self.latencies.append((name, late))
+
+    def latency_summary(self):
+        """Scheduled-vs-actual start of recent cues in ms: median, worst, and per cue the latest."""
+        with self._cond:  # the scheduler thread appends while we read
+            latencies = list(self.latencies)
+        if not latencies:
+            return {}
+        late = sorted(seconds for _, seconds in latencies)
+        return {
+            "cues": len(late),
+            "median_ms": late[len(late) // 2] * 1000,
+            "max_ms": late[-1] * 1000,
+            "last_ms": {name: seconds * 1000 for name, seconds in latencies},
+        }
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
 
 class SoundEffects:
-    def __init__(self, sound_folder="arena_sounds"):
+    def __init__(self, sound_folder="arena_sounds", cache_folder=CACHE_FOLDER):
         pygame.mixer.init()
         self.sound_folder = sound_folder
+        self.cache_folder = cache_folder
         self.sounds = {}
+        self.cues = CueScheduler()
+
+        self.load_all()
+
+    def load_all(self):
+        """Load SOUNDS plus every other WAV in the sound folder, in parallel."""
+        entries = dict(SOUNDS)
+        named = {filename for filename, _ in SOUNDS.values()}
+        for path in sorted(glob.glob(os.path.join(self.sound_folder, "*.wav"))):
+            filename = os.path.basename(path)
+            if filename not in named:
+                entries[os.path.splitext(filename)[0]] = (filename, 1.0)
+
+        def load(item):
+            name, (filename, volume) = item
+            try:
+                return self.load_sound(name, filename, volume)
+            except Exception as e:
+                print(f"[SoundEffects] Could not load {filename}: {e}")
+                return None
 
-        # Preload common sound effects
-        self.load_sound("countdown", "3sec_countdown.wav")
-        self.load_sound("chase_seq", "chase_seq.wav", volume=0.2)        # low volume
-        self.load_sound("buzzer", "buzzer.wav", volume = 0.55)
+        with ThreadPoolExecutor(max_workers=min(8, len(entries) or 1)) as pool:
+            keys = list(pool.map(load, entries.items()))
+        self._prune_cache({key for key in keys if key})
 
     def load_sound(self, name, filename, volume=1.0):
-        """Load a sound, convert to mono, and set volume (0.0 → 1.0)."""
+        """
+        Load a sound, converted to mono, and set its volume (0.0 → 1.0).
+        The converted audio is cached on disk under a hash of the source file,
+        so it's only decoded again when the file changes. Returns the cache key.
+        """
         path = os.path.join(self.sound_folder, filename)
-        if os.path.exists(path):
-            audio = AudioSegment.from_file(path)
-            audio_mono = audio.set_channels(1)  # mix to mono
+        if not os.path.exists(path):
+            print(f"[SoundEffects] Warning: Sound file not found: {path}")
+            return None
 
-            temp_path = os.path.join(tempfile.gettempdir(), f"{name}_mono.wav")
-            audio_mono.export(temp_path, format="wav")
+        with open(path, "rb") as f:
+            source = f.read()
+        key = hashlib.sha256(CACHE_VERSION + source).hexdigest()[:32]
+        cache_path = os.path.join(self.cache_folder, f"{key}.wav")
 
-            sound = pygame.mixer.Sound(temp_path)
-            sound.set_volume(volume)  # volume per effect
-            self.sounds[name] = sound
-        else:
-            print(f"[SoundEffects] Warning: Sound file not found: {path}")
+        try:
+            with open(cache_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = _process(path)
+            try:
+                os.makedirs(self.cache_folder, exist_ok=True)
+                temp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, cache_path)  # never leave a half-written entry behind
+            except OSError as e:
+                print(f"[SoundEffects] Could not cache {filename}: {e}")
+
+        sound = pygame.mixer.Sound(file=io.BytesIO(data))  # straight from memory, no temp file
+        sound.set_volume(volume)  # volume per effect
+        self.sounds[name] = sound
+        return key
 
-    def play_sound(self, name, blocking=False):
-        """Play a sound by name. If blocking=True, waits until finished."""
+    def _prune_cache(self, keep):
+        # drop entries for sounds that have since changed or been removed
+        for path in glob.glob(os.path.join(self.cache_folder, "*.wav")):
+            if os.path.splitext(os.path.basename(path))[0] not in keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def play_sound(self, name, at=None, blocking=False):
+        """
+        Play a sound by name, at monotonic time `at` (now if None). Returns at
+        once unless blocking=True, which waits until it has finished.
+        """
         if name not in self.sounds:
             print(f"[SoundEffects] Sound '{name}' not loaded!")
             return
 
         sound = self.sounds[name]
+        if at is None:
+            at = time.monotonic()
+        self.cues.schedule(name, sound, at)
         if blocking:
-            sound.play()
-            time.sleep(sound.get_length())
-        else:
-            # Play in a separate thread to be non-blocking
-            threading.Thread(target=lambda: sound.play(), daemon=True).start()
+            time.sleep(max(0.0, at - time.monotonic()) + sound.get_length())
 
     # Example effects
-    def countdown_3sec(self):
-        self.play_sound("countdown")
-    
+    def countdown_3sec(self, go_at=None):
+        """Countdown timed so "go" lands at monotonic time go_at (e.g. when the robots arm), or starting now."""
+        self.play_sound("countdown", at=None if go_at is None else go_at - COUNTDOWN_LEAD)
+
     def chase_seq(self):
-        time.sleep(1.5)
-        self.play_sound("chase_seq")
-    
+        self.play_sound("chase_seq", at=time.monotonic() + CHASE_DELAY)
+
     def buzzer(self):
-        time.sleep(5)
-        self.play_sound("buzzer")
+        self.play_sound("buzzer", at=time.monotonic() + BUZZER_DELAY)
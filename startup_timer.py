@@ -0,0 +1,76 @@
+# startup_timer.py — times each startup step (in order or in parallel) and prints where the time went
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """
+    Records how long each startup step took, relative to when the timer was
+    created. step() times work on the calling thread; background() runs a
+    step on its own daemon thread and returns a Future for its result.
+    """
+
+    def __init__(self, t0=None):
+        self.t0 = t0 if t0 is not None else time.perf_counter()  # a time.perf_counter() value
+        self.steps = []  # [name, started (s after t0), duration (s) or None while running, thread name]
+        self.milestones = []  # (name, s after t0)
+        self._lock = threading.Lock()
+        self._reported = False  # background steps finishing after report() print their own line
+
+    def _begin(self, name):
+        entry = [name, time.perf_counter() - self.t0, None, threading.current_thread().name]
+        with self._lock:
+            self.steps.append(entry)
+        return entry
+
+    def _end(self, entry):
+        entry[2] = time.perf_counter() - self.t0 - entry[1]
+
+    @contextmanager
+    def step(self, name):
+        entry = self._begin(name)
+        try:
+            yield
+        finally:
+            self._end(entry)
+
+    def background(self, name, fn, *args):
+        future = Future()
+
+        def _run():
+            entry = self._begin(name)
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                print(f"[startup] {name} failed: {e}")
+                future.set_exception(e)
+            finally:
+                self._end(entry)
+                if self._reported:
+                    print(f"[startup] {name} ready after {entry[2] * 1000:.1f} ms (at {(entry[1] + entry[2]) * 1000:.1f} ms)")
+
+        threading.Thread(target=_run, name=name, daemon=True).start()
+        return future
+
+    def record(self, name, started, ended):
+        """Add a step timed elsewhere, from two time.perf_counter() values."""
+        with self._lock:
+            self.steps.append([name, started - self.t0, ended - started, threading.current_thread().name])
+
+    def mark(self, name):
+        """Note that the program reached `name` (e.g. "ready for pairing") now."""
+        self.milestones.append((name, time.perf_counter() - self.t0))
+
+    def report(self):
+        self._reported = True
+        print("\nStartup time by subsystem:")
+        with self._lock:
+            steps = sorted(self.steps, key=lambda entry: entry[1])
+        for name, started, duration, thread in steps:
+            took = "still running" if duration is None else f"{duration * 1000:7.1f} ms"
+            where = "" if thread == "MainThread" else " (background)"
+            print(f"  {name:<28} at {started * 1000:7.1f} ms  took {took}{where}")
+        for name, at in self.milestones:
+            print(f"  -> {name} at {at * 1000:.1f} ms")